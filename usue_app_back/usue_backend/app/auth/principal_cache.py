@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.core.settings import settings
+from app.models import User
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Лёгкая копия пользователя, не привязанная к сессии SQLAlchemy."""
+
+    id: int
+    username: str
+    full_name: str
+    email: str
+    role: str
+    phone: str
+    address: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            full_name=user.full_name,
+            email=user.email,
+            role=user.role,
+            phone=user.phone,
+            address=user.address,
+        )
+
+
+class PrincipalCache:
+    """TTL-кэш проверенных токенов: claims и снимок пользователя по строке токена.
+
+    Запись живёт не дольше `ttl` секунд и не дольше `exp` из токена. При
+    изменении пользователя его записи нужно сбросить через `invalidate_user`.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, dict, UserSnapshot]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, _, snapshot = entry
+        if expires_at <= time.monotonic():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return snapshot
+
+    def put(self, token: str, claims: dict, snapshot: UserSnapshot) -> None:
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        ttl = self.ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+            if ttl <= 0:
+                return
+        self._entries[token] = (time.monotonic() + ttl, claims, snapshot)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        stale = [token for token, (_, _, snapshot) in self._entries.items() if snapshot.id == user_id]
+        for token in stale:
+            del self._entries[token]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl,
+)
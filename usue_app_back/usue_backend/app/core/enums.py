@@ -11,3 +11,20 @@ class OrderStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     CANCELED = "canceled"
+
+
+class OrderListView(str, Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class ProductSort(str, Enum):
+    NEWEST = "newest"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+    TITLE = "title"
+
+
+class DataFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
@@ -1,9 +1,129 @@
+import asyncio
+import base64
 import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
 
+from app.core.settings import settings
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+PBKDF2_ALGORITHM = "pbkdf2_sha256"
+SALT_BYTES = 16
+
+T = TypeVar("T")
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(password: str, iterations: int | None = None) -> str:
+    """Хэш в формате `pbkdf2_sha256$<итерации>$<соль>$<хэш>` (соль и хэш в base64)."""
+    iterations = iterations or settings.password_hash_iterations
+    salt = os.urandom(SALT_BYTES)
+    return f"{PBKDF2_ALGORITHM}${iterations}${_b64(salt)}${_b64(_pbkdf2(password, salt, iterations))}"
+
+
+# Хэш без пароля для проверки, когда пользователя нет: логин по несуществующему имени
+# стоит столько же, сколько по существующему, и не выдаёт, какие имена заняты.
+DUMMY_PASSWORD_HASH = (
+    f"{PBKDF2_ALGORITHM}${settings.password_hash_iterations}${_b64(bytes(SALT_BYTES))}${_b64(bytes(32))}"
+)
+
+
+def _is_legacy_hash(hashed: str) -> bool:
+    return "$" not in hashed
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return hash_password(password) == hashed
+    if _is_legacy_hash(hashed):
+        legacy = hashlib.sha256(password.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(legacy, hashed)
+    try:
+        algorithm, iterations, salt, expected = hashed.split("$")
+        if algorithm != PBKDF2_ALGORITHM:
+            return False
+        actual = _pbkdf2(password, base64.b64decode(salt), int(iterations))
+        return hmac.compare_digest(actual, base64.b64decode(expected))
+    except ValueError:
+        return False
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True для старых sha256-хэшей и хэшей с меньшим числом итераций, чем в настройках."""
+    if _is_legacy_hash(hashed):
+        return True
+    parts = hashed.split("$")
+    if len(parts) != 4 or parts[0] != PBKDF2_ALGORITHM:
+        return True
+    try:
+        return int(parts[1]) < settings.password_hash_iterations
+    except ValueError:
+        return True
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Очередь на хэширование заполнена."""
+
+
+class PasswordHasher:
+    """Выполняет хэширование паролей в отдельном пуле потоков, не блокируя event loop.
+
+    pbkdf2_hmac отпускает GIL, поэтому потоков достаточно. Число ожидающих
+    операций ограничено `max_pending`: всплеск логинов получает отказ, а не
+    растущую очередь. Счётчики времени доступны через `stats()`.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.calls = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.pending -= 1
+            self.calls += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "avg_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
@@ -17,12 +17,42 @@ class AuthJWT(BaseModel):
     access_token_expire_minutes: int = 15
 
 
+class SQLiteProfile(BaseModel):
+    """PRAGMA, которые выставляются на каждом новом соединении с SQLite."""
+
+    enabled: bool = os.getenv("DB_SQLITE_TUNING", "true").lower() == "true"
+    journal_mode: str = os.getenv("DB_SQLITE_JOURNAL_MODE", "WAL")
+    synchronous: str = os.getenv("DB_SQLITE_SYNCHRONOUS", "NORMAL")
+    busy_timeout_ms: int = int(os.getenv("DB_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    mmap_size: int = int(os.getenv("DB_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    cache_size: int = int(os.getenv("DB_SQLITE_CACHE_SIZE", "-65536"))
+    temp_store: str = os.getenv("DB_SQLITE_TEMP_STORE", "MEMORY")
+
+
 class Settings(BaseSettings):
     db_url: str = os.getenv(
         "DB_URL",
         f"sqlite+aiosqlite:///{(BASE_DIR / 'usue_shop.db').as_posix()}",
     )
+    # Пустое значение: для файла SQLite читатель открывает ту же базу в режиме только для чтения.
+    db_read_url: str = os.getenv("DB_READ_URL", "")
     db_echo: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    sqlite: SQLiteProfile = SQLiteProfile()
+    # Списки товаров, заказов и пользователей сериализуются напрямую в байты, без второй валидации.
+    fast_json_responses: bool = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+    catalog_cache_size: int = int(os.getenv("CATALOG_CACHE_SIZE", "512"))
+    principal_cache_size: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+    principal_cache_ttl: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    password_hash_iterations: int = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    media_derivative_workers: int = int(os.getenv("MEDIA_DERIVATIVE_WORKERS", "2"))
+    media_derivative_quality: int = int(os.getenv("MEDIA_DERIVATIVE_QUALITY", "80"))
+    media_upload_max_bytes: int = int(os.getenv("MEDIA_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
     auth_jwt: AuthJWT = AuthJWT()
 
 
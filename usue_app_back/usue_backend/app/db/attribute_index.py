@@ -0,0 +1,77 @@
+from typing import Dict, Iterable, List
+
+from sqlalchemy import ColumnElement, Select, delete, false, func, insert, select, true, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product, ProductAttribute
+from .database import db
+
+
+async def init_attribute_index() -> None:
+    """Заполняет product_attributes из JSON-характеристик, если таблица пуста (новая или старая база)."""
+    async with db.engine.begin() as conn:
+        indexed = await conn.scalar(select(func.count()).select_from(ProductAttribute))
+        if indexed:
+            return
+        characteristics = func.json_each(Product.characteristics).table_valued("key", "value")
+        await conn.execute(
+            insert(ProductAttribute).from_select(
+                ["product_id", "name", "value", "is_deleted"],
+                select(Product.id, characteristics.c.key, characteristics.c.value, false())
+                .select_from(Product)
+                .join(characteristics, true()),
+            )
+        )
+
+
+async def index_product_attributes(session: AsyncSession, products: Iterable[Product]) -> None:
+    """Пересобирает характеристики товаров в product_attributes в текущей транзакции."""
+    products = list(products)
+    if not products:
+        return
+    await session.execute(
+        delete(ProductAttribute).where(ProductAttribute.product_id.in_([product.id for product in products]))
+    )
+    rows = [
+        {"product_id": product.id, "name": name, "value": str(value)}
+        for product in products
+        for name, value in (product.characteristics or {}).items()
+    ]
+    if rows:
+        await session.execute(insert(ProductAttribute), rows)
+
+
+def attribute_conditions(filters: Dict[str, List[str]]) -> List[ColumnElement]:
+    """Условия на Product.id: разные характеристики объединяются через И, значения одной — через ИЛИ."""
+    return [
+        Product.id.in_(
+            select(ProductAttribute.product_id).where(
+                ProductAttribute.name == name,
+                ProductAttribute.value.in_(values),
+            )
+        )
+        for name, values in filters.items()
+    ]
+
+
+def facet_counts_query(base_conditions: List[ColumnElement], filters: Dict[str, List[str]]) -> Select:
+    """Число товаров по каждому значению каждой характеристики при текущих фильтрах.
+
+    Для характеристики, по которой уже стоит фильтр, её собственный фильтр
+    не учитывается — так видно, сколько товаров даст выбор другого значения.
+    Все подзапросы объединены в один UNION ALL.
+    """
+
+    def counts(conditions: List[ColumnElement], name_condition: ColumnElement) -> Select:
+        query = select(ProductAttribute.name, ProductAttribute.value, func.count().label("count")).where(
+            name_condition
+        )
+        if conditions:
+            query = query.where(ProductAttribute.product_id.in_(select(Product.id).where(*conditions)))
+        return query.group_by(ProductAttribute.name, ProductAttribute.value)
+
+    queries = [counts(base_conditions + attribute_conditions(filters), ProductAttribute.name.not_in(filters))]
+    for name in filters:
+        others = {other: values for other, values in filters.items() if other != name}
+        queries.append(counts(base_conditions + attribute_conditions(others), ProductAttribute.name == name))
+    return queries[0] if len(queries) == 1 else union_all(*queries)
@@ -0,0 +1,53 @@
+from sqlalchemy import bindparam, select, update
+
+from app.models import Category, OrderItem, Product
+from .database import db
+
+
+async def backfill_order_item_snapshots() -> int:
+    """Заполняет снимок товара (название, картинка, категория) у позиций заказов, где его нет.
+
+    Позиции, чей товар уже удалён, получают пустые строки, чтобы не
+    обрабатываться повторно. Возвращает число обновлённых товаров.
+    """
+    async for session in db.get_session():
+        product_ids = (
+            await session.scalars(select(OrderItem.product_id).where(OrderItem.title.is_(None)).distinct())
+        ).all()
+        if not product_ids:
+            return 0
+
+        result = await session.execute(
+            select(Product.id, Product.title, Product.image_urls, Category.slug)
+            .outerjoin(Category, Category.id == Product.category_id)
+            .where(Product.id.in_(product_ids))
+        )
+        snapshots = {
+            product_id: {
+                "snapshot_title": title,
+                "snapshot_image_url": image_urls[0] if image_urls else "",
+                "snapshot_category_slug": slug or "",
+            }
+            for product_id, title, image_urls, slug in result.all()
+        }
+        empty = {"snapshot_title": "", "snapshot_image_url": "", "snapshot_category_slug": ""}
+        statement = (
+            update(OrderItem)
+            .where(OrderItem.product_id == bindparam("snapshot_product_id"), OrderItem.title.is_(None))
+            .values(
+                title=bindparam("snapshot_title"),
+                image_url=bindparam("snapshot_image_url"),
+                category_slug=bindparam("snapshot_category_slug"),
+            )
+        )
+        connection = await session.connection()
+        await connection.execute(
+            statement,
+            [
+                {"snapshot_product_id": product_id, **snapshots.get(product_id, empty)}
+                for product_id in product_ids
+            ],
+        )
+        await session.commit()
+        return len(product_ids)
+    return 0
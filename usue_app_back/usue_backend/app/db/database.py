@@ -1,29 +1,133 @@
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.core.settings import settings
+from app.core.settings import SQLiteProfile, settings
 from app.models import Base
 
 load_dotenv()
 
 
+def _apply_sqlite_profile(dbapi_connection, profile: SQLiteProfile, read_only: bool = False) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # Режим журнала хранится в самом файле базы, и менять его может только писатель.
+        if not read_only:
+            cursor.execute(f"PRAGMA journal_mode={profile.journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={profile.synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(profile.busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(profile.mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={int(profile.cache_size)}")
+        cursor.execute(f"PRAGMA temp_store={profile.temp_store}")
+    finally:
+        cursor.close()
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _sqlite_read_only_url(url: URL) -> URL:
+    return url.set(database=f"file:{url.database}", query={**url.query, "mode": "ro", "uri": "true"})
+
+
 class Database:
-    """Упрощённый слой работы с SQLAlchemy."""
+    """Упрощённый слой работы с SQLAlchemy.
+
+    Запросы на чтение идут через отдельный движок `read_engine`: реплику из
+    `read_url` или, для файла SQLite, ту же базу, открытую только на чтение.
+    Для in-memory SQLite и прочих баз без `read_url` оба движка совпадают.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        echo: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        sqlite_profile: Optional[SQLiteProfile] = None,
+        read_url: Optional[str] = None,
+    ):
+        pool_options = {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": pool_timeout}
+        self._sqlite_profile = sqlite_profile
+        parsed_url = make_url(url)
+        self.engine = self._create_engine(parsed_url, echo, pool_options)
+
+        if read_url:
+            self.read_engine = self._create_engine(make_url(read_url), echo, pool_options, read_only=True)
+        elif _is_sqlite_file(parsed_url):
+            self.read_engine = self._create_engine(
+                _sqlite_read_only_url(parsed_url), echo, pool_options, read_only=True
+            )
+        else:
+            self.read_engine = self.engine
 
-    def __init__(self, url: str, echo: bool = False):
-        self.engine = create_async_engine(url, echo=echo)
         self._session_factory = sessionmaker(
             self.engine,
             expire_on_commit=False,
             class_=AsyncSession,
         )
+        self._read_session_factory = sessionmaker(
+            self.read_engine,
+            expire_on_commit=False,
+            class_=AsyncSession,
+        )
+
+    def _create_engine(self, url: URL, echo: bool, pool_options: dict, read_only: bool = False) -> AsyncEngine:
+        is_sqlite = url.get_backend_name() == "sqlite"
+        engine_options = {"echo": echo}
+        # In-memory SQLite работает на StaticPool, которому размеры пула не передаются.
+        if not is_sqlite or _is_sqlite_file(url):
+            engine_options.update(pool_options)
+        engine = create_async_engine(url, **engine_options)
+        profile = self._sqlite_profile
+        if is_sqlite and profile is not None and profile.enabled:
+            event.listen(
+                engine.sync_engine,
+                "connect",
+                lambda dbapi_connection, _: _apply_sqlite_profile(dbapi_connection, profile, read_only),
+            )
+        return engine
 
     async def init_models(self) -> None:
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(self._add_missing_columns)
+            await conn.run_sync(self._create_missing_indexes)
+
+    @staticmethod
+    def _add_missing_columns(sync_conn) -> None:
+        """Добавляет в существующие таблицы новые nullable-колонки моделей (ALTER TABLE ADD COLUMN)."""
+        inspector = inspect(sync_conn)
+        preparer = sync_conn.dialect.identifier_preparer
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} automatically")
+                column_type = column.type.compile(dialect=sync_conn.dialect)
+                sync_conn.execute(
+                    text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+                    )
+                )
+
+    @staticmethod
+    def _create_missing_indexes(sync_conn) -> None:
+        """create_all не трогает уже существующие таблицы, поэтому новые индексы докатываем отдельно."""
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
 
     async def drop_models(self) -> None:
         async with self.engine.begin() as conn:
@@ -38,5 +142,17 @@ class Database:
         async with self._session_factory() as session:
             yield session
 
+    async def get_read_session(self) -> AsyncIterator[AsyncSession]:
+        async with self._read_session_factory() as session:
+            yield session
+
 
-db = Database(url=settings.db_url, echo=settings.db_echo)
+db = Database(
+    url=settings.db_url,
+    echo=settings.db_echo,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    sqlite_profile=settings.sqlite,
+    read_url=settings.db_read_url or None,
+)
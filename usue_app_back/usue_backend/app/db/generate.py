@@ -0,0 +1,293 @@
+"""Синтетические данные для нагрузочных замеров: товары, покупатели и заказы в заданном объёме.
+
+    python -m app.db.generate --products 5000 --users 100000 --orders 1000000
+
+Данные дописываются в базу из DB_URL поверх демо-данных `seed_database`
+(`--reset` сначала пересоздаёт схему). Один и тот же `--seed` на той же
+исходной базе даёт те же строки при любом `--chunk-size`; отличается только
+соль общего хэша пароля. Строки пишутся через Core executemany пачками по
+`--chunk-size`, каждая пачка в своей транзакции. Поисковый индекс и индекс
+характеристик заполняются вместе с товарами, дневные агрегаты продаж
+пересчитываются в конце.
+
+Пароль всех сгенерированных покупателей — `loadpass`.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Tuple
+
+from sqlalchemy import String, bindparam, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.enums import OrderStatus, UserRole
+from app.core.security import hash_password
+from app.models import Category, Order, OrderItem, Product, ProductAttribute, User
+from .attribute_index import init_attribute_index
+from .database import db
+from .rollups import rebuild_sales_rollups
+from .search_index import SEARCH_TABLE, init_search_index, products_fts
+from .seed import PRODUCT_MEDIA, seed_database
+
+DEFAULT_CHUNK_SIZE = 10_000
+PRODUCT_PREFIX = "gen"
+ORDER_PREFIX = "GEN"
+USERNAME_PREFIX = "load"
+SYNTHETIC_PASSWORD = "loadpass"
+# Начало периода фиксировано, чтобы даты не зависели от дня запуска.
+PERIOD_START = datetime(2024, 1, 1)
+
+_ADJECTIVES = ["Пульс", "Поток", "Нео", "Эдж", "Флекс", "Сенс", "Прайм", "Эйр", "Нова", "Спарк"]
+_FINISHES = ["Графит", "Арктик", "Роуз", "Индиго", "Янтарь"]
+_POWER = ["USB-C", "Батарея", "Сеть 220 В"]
+_WARRANTY = ["12 месяцев", "18 месяцев", "24 месяца", "36 месяцев"]
+_STATUSES = [status.value for status in OrderStatus]
+_STATUS_CUM_WEIGHTS = [20, 35, 90, 100]  # new 20%, in_progress 15%, completed 55%, canceled 10%
+
+# (id, цена, название, первая картинка, slug категории) — всё, что нужно для позиции заказа.
+ProductRef = Tuple[str, float, str, str, str]
+
+
+def _timestamp(value: datetime) -> str:
+    # Тот же вид, что у CURRENT_TIMESTAMP, которым база заполняет created сама.
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _chunks(count: int, chunk_size: int) -> Iterator[range]:
+    for start in range(0, count, chunk_size):
+        yield range(start, min(start + chunk_size, count))
+
+
+class _Progress:
+    def __init__(self, label: str, total: int):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def advance(self, rows: int) -> None:
+        self.done += rows
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        percent = self.done / self.total * 100 if self.total else 100.0
+        print(
+            f"{self.label}: {self.done}/{self.total} ({percent:.0f}%), {rate:,.0f} rows/s",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+async def _ensure_not_generated(conn: AsyncConnection) -> None:
+    generated = await conn.scalar(
+        select(func.count()).select_from(Product).where(Product.id.like(f"{PRODUCT_PREFIX}-%"))
+    )
+    generated = generated or await conn.scalar(
+        select(func.count()).select_from(Order).where(Order.id.like(f"{ORDER_PREFIX}-%"))
+    )
+    if generated:
+        raise SystemExit("Synthetic data is already present, run with --reset to regenerate")
+
+
+async def _insert_products(rng: random.Random, count: int, chunk_size: int, span: timedelta) -> None:
+    async with db.engine.connect() as conn:
+        categories = (
+            await conn.execute(select(Category.id, Category.slug, Category.hero_image).order_by(Category.id))
+        ).all()
+    if not categories:
+        raise SystemExit("No categories to attach products to")
+    statement = insert(Product).values(created=bindparam("created_at", type_=String))
+    step = span / max(count, 1)
+    progress = _Progress("products", count)
+    for chunk in _chunks(count, chunk_size):
+        products, search_rows, attribute_rows = [], [], []
+        for index in chunk:
+            category_id, slug, hero_image = categories[index % len(categories)]
+            media = PRODUCT_MEDIA.get(slug.replace("-", "_"))
+            product_id = f"{PRODUCT_PREFIX}-{slug}-{index + 1}"
+            title = f"{rng.choice(_ADJECTIVES)} {rng.choice(_FINISHES)} {index + 1}"
+            description = f"Синтетический товар #{index + 1} для нагрузочных замеров."
+            characteristics = {
+                "Материал": rng.choice(_FINISHES),
+                "Питание": rng.choice(_POWER),
+                "Гарантия": rng.choice(_WARRANTY),
+            }
+            products.append(
+                {
+                    "id": product_id,
+                    "category_id": category_id,
+                    "title": title,
+                    "description": description,
+                    "price": float(rng.randrange(490, 49_990, 10)),
+                    "image_urls": [media[index % len(media)] if media else hero_image],
+                    "characteristics": characteristics,
+                    "created_at": _timestamp(PERIOD_START + step * index),
+                }
+            )
+            search_rows.append(
+                {
+                    "product_id": product_id,
+                    "title": title,
+                    "description": description,
+                    "characteristics": " ".join(characteristics.values()),
+                }
+            )
+            attribute_rows.extend(
+                {"product_id": product_id, "name": name, "value": value} for name, value in characteristics.items()
+            )
+        async with db.engine.begin() as conn:
+            await conn.execute(statement, products)
+            await conn.execute(insert(products_fts), search_rows)
+            await conn.execute(insert(ProductAttribute), attribute_rows)
+        progress.advance(len(chunk))
+
+
+async def _insert_users(count: int, chunk_size: int) -> None:
+    # Один хэш на всех: медленный KDF на миллион одинаковых паролей занял бы часы.
+    password_hash = hash_password(SYNTHETIC_PASSWORD)
+    progress = _Progress("users", count)
+    for chunk in _chunks(count, chunk_size):
+        rows = [
+            {
+                "username": f"{USERNAME_PREFIX}{index + 1:07d}",
+                "full_name": f"Нагрузочный покупатель {index + 1}",
+                "email": f"{USERNAME_PREFIX}{index + 1:07d}@usue.app",
+                "password_hash": password_hash,
+                "role": UserRole.CUSTOMER.value,
+                "phone": f"+7 900 {index // 10_000 % 1000:03d}-{index % 10_000:04d}",
+                "address": "Екатеринбург",
+            }
+            for index in chunk
+        ]
+        async with db.engine.begin() as conn:
+            await conn.execute(insert(User), rows)
+        progress.advance(len(chunk))
+
+
+async def _order_pools() -> Tuple[List[int], List[ProductRef]]:
+    async with db.engine.connect() as conn:
+        customers = select(User.id).where(User.role == UserRole.CUSTOMER.value).order_by(User.id)
+        user_ids = list((await conn.scalars(customers)).all())
+        rows = (
+            await conn.execute(
+                select(Product.id, Product.price, Product.title, Product.image_urls, Category.slug)
+                .join(Category, Category.id == Product.category_id)
+                .order_by(Product.id)
+            )
+        ).all()
+    products = [
+        (product_id, price, title, image_urls[0] if image_urls else "", slug)
+        for product_id, price, title, image_urls, slug in rows
+    ]
+    return user_ids, products
+
+
+async def _insert_orders(rng: random.Random, count: int, chunk_size: int, span: timedelta) -> None:
+    user_ids, products = await _order_pools()
+    if count and not (user_ids and products):
+        raise SystemExit("Orders need at least one customer and one product")
+    statement = insert(Order).values(created=bindparam("created_at", type_=String))
+    span_seconds = span.total_seconds()
+    progress = _Progress("orders", count)
+    for chunk in _chunks(count, chunk_size):
+        orders, items = [], []
+        for index in chunk:
+            order_id = f"{ORDER_PREFIX}-{index + 1:08d}"
+            total_sum = 0.0
+            for _ in range(rng.randint(1, 3)):
+                product_id, price, title, image_url, slug = rng.choice(products)
+                quantity = rng.randint(1, 3)
+                total_sum += price * quantity
+                items.append(
+                    {
+                        "order_id": order_id,
+                        "product_id": product_id,
+                        "quantity": quantity,
+                        "price": price,
+                        "title": title,
+                        "image_url": image_url,
+                        "category_slug": slug,
+                    }
+                )
+            orders.append(
+                {
+                    "id": order_id,
+                    "user_id": rng.choice(user_ids),
+                    "status": rng.choices(_STATUSES, cum_weights=_STATUS_CUM_WEIGHTS)[0],
+                    "total_sum": total_sum,
+                    "created_at": _timestamp(PERIOD_START + timedelta(seconds=int(rng.random() * span_seconds))),
+                }
+            )
+        async with db.engine.begin() as conn:
+            await conn.execute(statement, orders)
+            await conn.execute(insert(OrderItem), items)
+        progress.advance(len(chunk))
+
+
+async def generate(
+    products: int,
+    users: int,
+    orders: int,
+    seed: int = 42,
+    days: int = 365,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> None:
+    """Дописывает товары, покупателей и заказы в текущую базу; схема и демо-данные уже должны быть."""
+    async with db.engine.connect() as conn:
+        await _ensure_not_generated(conn)
+    span = timedelta(days=days)
+    # Свой генератор на товары и на заказы: каталог не зависит от --orders. Заказы
+    # выбирают из пула товаров и покупателей, поэтому меняются вместе с --products и --users.
+    await _insert_products(random.Random(f"{seed}:products"), products, chunk_size, span)
+    await _insert_users(users, chunk_size)
+    await _insert_orders(random.Random(f"{seed}:orders"), orders, chunk_size, span)
+    await rebuild_sales_rollups()
+
+
+async def _reset() -> None:
+    await db.drop_models()
+    async with db.engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+
+async def main(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    try:
+        if args.reset:
+            await _reset()
+        await db.init_models()
+        await init_search_index()
+        await init_attribute_index()
+        await seed_database()
+        await generate(args.products, args.users, args.orders, args.seed, args.days, args.chunk_size)
+    finally:
+        await db.engine.dispose()
+        await db.read_engine.dispose()
+    print(
+        f"Generated {args.products} product(s), {args.users} user(s), {args.orders} order(s) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def _at_least(minimum: int) -> Callable[[str], int]:
+    def parse(value: str) -> int:
+        number = int(value)
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}")
+        return number
+
+    return parse
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=_at_least(0), default=5_000, help="сколько товаров добавить")
+    parser.add_argument("--users", type=_at_least(0), default=10_000, help="сколько покупателей добавить")
+    parser.add_argument("--orders", type=_at_least(0), default=100_000, help="сколько заказов добавить")
+    parser.add_argument("--days", type=_at_least(1), default=365, help="период дат заказов от 2024-01-01")
+    parser.add_argument("--seed", type=int, default=42, help="зерно генератора")
+    parser.add_argument("--chunk-size", type=_at_least(1), default=DEFAULT_CHUNK_SIZE, help="строк на транзакцию")
+    parser.add_argument("--reset", action="store_true", help="пересоздать схему перед генерацией")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,176 @@
+"""Дневные агрегаты продаж (sales_daily_status, sales_daily_category).
+
+Агрегаты обновляются в той же транзакции, что и заказ (`apply_order_sales`),
+и могут быть пересчитаны целиком из orders/order_items:
+
+    python -m app.db.rollups
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import String, delete, false, func, insert, select, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models import Order, OrderItem, SalesDailyCategory, SalesDailyStatus
+from .database import db
+
+# (категория из снимка позиции, количество, цена за единицу)
+SaleItem = Tuple[Optional[str], int, float]
+
+
+def sales_day(created: datetime) -> str:
+    """День заказа в том же виде, что и первые 10 символов `created` в базе (UTC)."""
+    return created.strftime("%Y-%m-%d")
+
+
+def _upsert(model, rows: list, key_columns: list):
+    statement = sqlite_insert(model).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            "revenue": model.revenue + statement.excluded.revenue,
+            "orders": model.orders + statement.excluded.orders,
+            "units": model.units + statement.excluded.units,
+            "updated": func.now(),
+        },
+    )
+
+
+async def apply_order_sales(
+    session: AsyncSession,
+    created: datetime,
+    status: str,
+    total_sum: float,
+    items: Iterable[SaleItem],
+    sign: int = 1,
+) -> None:
+    """Добавляет заказ в агрегаты (`sign=1`) или вычитает из них (`sign=-1`) в текущей транзакции.
+
+    Смена статуса — это вычитание со старым статусом и добавление с новым. Строки,
+    в которых после вычитания не осталось заказов, удаляются, как и при полном пересчёте.
+    """
+    day = sales_day(created)
+    units = 0
+    categories: Dict[str, list] = defaultdict(lambda: [0.0, 0])
+    for category_slug, quantity, price in items:
+        units += quantity
+        totals = categories[category_slug or ""]
+        totals[0] += price * quantity
+        totals[1] += quantity
+
+    await session.execute(
+        _upsert(
+            SalesDailyStatus,
+            [{"day": day, "status": status, "revenue": sign * total_sum, "orders": sign, "units": sign * units}],
+            [SalesDailyStatus.day, SalesDailyStatus.status],
+        )
+    )
+    if categories:
+        await session.execute(
+            _upsert(
+                SalesDailyCategory,
+                [
+                    {
+                        "day": day,
+                        "category_slug": category_slug,
+                        "status": status,
+                        "revenue": sign * revenue,
+                        "orders": sign,
+                        "units": sign * quantity,
+                    }
+                    for category_slug, (revenue, quantity) in categories.items()
+                ],
+                [SalesDailyCategory.day, SalesDailyCategory.category_slug, SalesDailyCategory.status],
+            )
+        )
+    if sign < 0:
+        for model in (SalesDailyStatus, SalesDailyCategory):
+            await session.execute(
+                delete(model).where(model.day == day, model.status == status, model.orders <= 0)
+            )
+
+
+def _order_day():
+    # Сырые первые 10 символов: одинаково для обоих форматов, в которых в базе лежит created.
+    return func.substr(type_coerce(Order.created, String), 1, 10)
+
+
+async def _rebuild(conn: AsyncConnection) -> None:
+    await conn.execute(delete(SalesDailyStatus))
+    await conn.execute(delete(SalesDailyCategory))
+
+    order_units = (
+        select(OrderItem.order_id, func.sum(OrderItem.quantity).label("units"))
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+    day = _order_day()
+    await conn.execute(
+        insert(SalesDailyStatus).from_select(
+            ["day", "status", "revenue", "orders", "units", "is_deleted"],
+            select(
+                day,
+                Order.status,
+                func.sum(Order.total_sum),
+                func.count(Order.id),
+                func.coalesce(func.sum(order_units.c.units), 0),
+                false(),
+            )
+            .outerjoin(order_units, order_units.c.order_id == Order.id)
+            .group_by(day, Order.status),
+        )
+    )
+    category = func.coalesce(OrderItem.category_slug, "")
+    await conn.execute(
+        insert(SalesDailyCategory).from_select(
+            ["day", "category_slug", "status", "revenue", "orders", "units", "is_deleted"],
+            select(
+                day,
+                category,
+                Order.status,
+                func.sum(OrderItem.price * OrderItem.quantity),
+                func.count(func.distinct(Order.id)),
+                func.sum(OrderItem.quantity),
+                false(),
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .group_by(day, category, Order.status),
+        )
+    )
+
+
+async def rebuild_sales_rollups() -> None:
+    """Пересчитывает агрегаты из orders/order_items одной транзакцией."""
+    async with db.engine.begin() as conn:
+        await _rebuild(conn)
+
+
+async def init_sales_rollups() -> None:
+    """Заполняет агрегаты для базы, где заказы уже есть, а агрегатов ещё нет."""
+    async with db.engine.begin() as conn:
+        if await conn.scalar(select(func.count()).select_from(SalesDailyStatus)):
+            return
+        if not await conn.scalar(select(func.count()).select_from(Order)):
+            return
+        await _rebuild(conn)
+
+
+async def main() -> None:
+    try:
+        await db.init_models()
+        await rebuild_sales_rollups()
+        async with db.engine.connect() as conn:
+            days = await conn.scalar(select(func.count(func.distinct(SalesDailyStatus.day))))
+    finally:
+        await db.engine.dispose()
+        await db.read_engine.dispose()
+    print(f"Sales rollups rebuilt: {days} day(s)")
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import Column, MetaData, Select, String, Table, Text, delete, func, insert, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product
+from .database import db
+
+SEARCH_TABLE = "products_fts"
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+_TOKEN_RE = re.compile(r"\w+")
+
+# Виртуальную таблицу FTS5 create_all создать не может, поэтому она описана
+# в отдельной MetaData и создаётся в init_search_index().
+products_fts = Table(
+    SEARCH_TABLE,
+    MetaData(),
+    Column("product_id", String),
+    Column("title", Text),
+    Column("description", Text),
+    Column("characteristics", Text),
+)
+
+_CREATE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    product_id UNINDEXED,
+    title,
+    description,
+    characteristics,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+_REBUILD_SQL = f"""
+INSERT INTO {SEARCH_TABLE} (product_id, title, description, characteristics)
+SELECT id, title, description,
+       (SELECT group_concat(value, ' ') FROM json_each(products.characteristics))
+FROM products
+"""
+
+
+async def init_search_index() -> None:
+    """Создаёт FTS5-индекс товаров и заполняет его, если он пуст (новая или старая база)."""
+    async with db.engine.begin() as conn:
+        await conn.execute(text(_CREATE_SQL))
+        indexed = await conn.scalar(select(func.count()).select_from(products_fts))
+        if not indexed:
+            await conn.execute(text(_REBUILD_SQL))
+
+
+async def index_products(session: AsyncSession, products: Iterable[Product]) -> None:
+    """Пишет товары в поисковый индекс в текущей транзакции, заменяя прежние записи."""
+    rows = [
+        {
+            "product_id": product.id,
+            "title": product.title,
+            "description": product.description,
+            "characteristics": " ".join(str(value) for value in (product.characteristics or {}).values()),
+        }
+        for product in products
+    ]
+    if not rows:
+        return
+    await session.execute(
+        delete(products_fts).where(products_fts.c.product_id.in_([row["product_id"] for row in rows]))
+    )
+    await session.execute(insert(products_fts), rows)
+
+
+def build_match_query(raw_query: str) -> Optional[str]:
+    """Превращает ввод пользователя в запрос FTS5: каждое слово ищется по префиксу, все слова обязательны.
+
+    Операторы FTS5 из ввода не пропускаются, поэтому синтаксической ошибки в MATCH не будет.
+    """
+    tokens = _TOKEN_RE.findall(raw_query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def product_search_query(match_query: str) -> Select:
+    """Товары по релевантности (bm25) вместе с фрагментом текста, где найдены слова."""
+    fts = literal_column(SEARCH_TABLE)
+    rank = literal_column(f"{SEARCH_TABLE}.rank")
+    return (
+        select(
+            Product,
+            func.snippet(fts, -1, SNIPPET_START, SNIPPET_END, "…", 12).label("snippet"),
+            rank.label("rank"),
+        )
+        .join(products_fts, products_fts.c.product_id == Product.id)
+        .where(fts.op("MATCH")(match_query))
+        .order_by(rank)
+    )
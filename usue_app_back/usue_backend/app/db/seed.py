@@ -6,7 +6,9 @@ from sqlalchemy import func, select
 from app.core.enums import OrderStatus, UserRole
 from app.core.security import hash_password
 from app.models import Category, Order, OrderItem, Product, Service, User
+from .attribute_index import index_product_attributes
 from .database import db
+from .search_index import index_products
 
 MEDIA_BASE_URL = "/static/media"
 
@@ -208,6 +210,8 @@ async def seed_database() -> None:
         products = _build_products(category_map)
         session.add_all(products)
         await session.flush()
+        await index_products(session, products)
+        await index_product_attributes(session, products)
 
         services = []
         for payload in SERVICES_SOURCE:
@@ -238,6 +242,8 @@ async def seed_database() -> None:
                 address="Екатеринбург",
             )
         ]
+        # Один хэш на всех демо-пользователей: медленный KDF на 199 одинаковых паролей тормозит старт.
+        demo_password_hash = hash_password("userpass")
         for index in range(1, 200):
             username = f"user{index:03d}"
             demo_users.append(
@@ -245,7 +251,7 @@ async def seed_database() -> None:
                     username=username,
                     full_name=f"Эко пользователь {index:03d}",
                     email=f"{username}@usue.app",
-                    password_hash=hash_password("userpass"),
+                    password_hash=demo_password_hash,
                     role=UserRole.CUSTOMER.value,
                     phone=f"+7 900 100-{index:04d}",
                     address="Екатеринбург",
@@ -275,6 +281,7 @@ async def seed_database() -> None:
         await session.flush()
 
         all_products = {product.id: product for product in products}
+        category_slugs = {category.id: category.slug for category in categories}
         orders: List[Order] = []
         order_items: List[OrderItem] = []
 
@@ -305,6 +312,9 @@ async def seed_database() -> None:
                         product_id=product.id,
                         quantity=quantity,
                         price=product.price,
+                        title=product.title,
+                        image_url=product.image_urls[0] if product.image_urls else "",
+                        category_slug=category_slugs[product.category_id],
                     )
                 )
                 order.total_sum += product.price * quantity
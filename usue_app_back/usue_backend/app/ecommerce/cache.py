@@ -0,0 +1,69 @@
+import hashlib
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from app.core.settings import settings
+
+CacheKey = Tuple[Hashable, ...]
+
+
+class CatalogCache:
+    """LRU-кэш ответов каталога, привязанный к версии каталога.
+
+    Версия растёт при каждом изменении категорий, товаров или услуг: ключи
+    со старой версией больше не находятся и вытесняются. Кэш живёт в памяти
+    процесса, поэтому при нескольких воркерах у каждого своя копия.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.version = 0
+        # Версия начинается с нуля при каждом старте, поэтому в ETag добавляем метку процесса.
+        self.instance = uuid.uuid4().hex[:8]
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Any]" = OrderedDict()
+
+    def key(self, *parts: Hashable) -> CacheKey:
+        return (self.version, *parts)
+
+    def etag(self, *parts: Hashable) -> str:
+        digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+        return f'"{self.instance}-{self.version}-{digest}"'
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: CacheKey, value: Any) -> None:
+        # Ответ, посчитанный до bump(), уже устарел — не сохраняем его.
+        if self.max_size <= 0 or key[0] != self.version:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def bump(self) -> int:
+        self.version += 1
+        self._entries.clear()
+        return self.version
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+catalog_cache = CatalogCache(max_size=settings.catalog_cache_size)
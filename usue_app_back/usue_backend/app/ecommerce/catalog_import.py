@@ -0,0 +1,254 @@
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import DataFormat
+from app.db.attribute_index import index_product_attributes
+from app.db.search_index import index_products
+from app.media.derivatives import image_derivatives
+from app.models import Category, Product
+from .schemas import ProductCreateRequest
+
+IMPORT_BATCH_SIZE = 500
+# Ошибок в ответе не больше этого числа, остальные только считаются.
+MAX_IMPORT_ERRORS = 1000
+CSV_IMAGE_SEPARATOR = "|"
+
+# Номер строки во входных данных и либо разобранная запись, либо текст ошибки.
+ParsedRow = Tuple[int, Union[dict, str]]
+
+
+class FeedDecodeError(ValueError):
+    """Поток не читается как UTF-8; строки до него уже разобраны."""
+
+
+@dataclass
+class ImportReport:
+    processed: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+    # Ошибка всего потока, после которой чтение остановлено (например, не UTF-8).
+    feed_error: Optional[str] = None
+
+    def add_error(self, line: int, product_id: Optional[str], message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append({"line": line, "id": product_id, "error": message})
+
+
+def _decode_error(line: int, exc: UnicodeDecodeError) -> FeedDecodeError:
+    return FeedDecodeError(f"Line {line}: feed is not valid UTF-8 ({exc.reason})")
+
+
+async def _lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Строки потока в UTF-8; в памяти только текущий кусок и недочитанная строка."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    read = 0
+    async for chunk in chunks:
+        try:
+            text = tail + decoder.decode(chunk)
+        except UnicodeDecodeError as exc:
+            # Строки до испорченного байта целы: отдаём их и сообщаем, на какой строке поток сломан.
+            valid = exc.object[: exc.start].decode("utf-8-sig" if not (read or tail) else "utf-8")
+            for line in (tail + valid).split("\n")[:-1]:
+                read += 1
+                yield line
+            raise _decode_error(read + 1, exc) from exc
+        *lines, tail = text.split("\n")
+        for line in lines:
+            read += 1
+            yield line
+    try:
+        tail += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise _decode_error(read + 1, exc) from exc
+    if tail:
+        yield tail
+
+
+async def _ndjson_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[ParsedRow]:
+    line_number = 0
+    async for line in _lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, f"Invalid JSON: {exc}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def _csv_row(values: Dict[str, str]) -> dict:
+    row: dict = {key: value for key, value in values.items() if key is not None}
+    urls = row.get("image_urls") or ""
+    row["image_urls"] = [url for url in urls.split(CSV_IMAGE_SEPARATOR) if url]
+    row["specs"] = json.loads(row["specs"]) if row.get("specs") else {}
+    return row
+
+
+async def _csv_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[ParsedRow]:
+    """Записи CSV с заголовком; `image_urls` через `|`, `specs` — JSON-объект.
+
+    Поле в кавычках может содержать перевод строки, поэтому строки копятся,
+    пока число кавычек в записи не станет чётным.
+    """
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    record_line = 0
+    line_number = 0
+    async for line in _lines(chunks):
+        line_number += 1
+        if not record:
+            record_line = line_number
+        record.append(line)
+        text = "\n".join(record)
+        if text.count('"') % 2:
+            continue
+        record = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        try:
+            yield record_line, _csv_row(dict(zip(header, values)))
+        except ValueError as exc:
+            yield record_line, f"Invalid specs JSON: {exc}"
+    if record:
+        yield record_line, "Unterminated quoted field"
+
+
+def parse_feed(chunks: AsyncIterable[bytes], feed_format: DataFormat) -> AsyncIterator[ParsedRow]:
+    if feed_format == DataFormat.CSV:
+        return _csv_rows(chunks)
+    return _ndjson_rows(chunks)
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def _upsert_statement(rows: List[dict]):
+    statement = sqlite_insert(Product).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[Product.id],
+        set_={
+            "category_id": statement.excluded.category_id,
+            "title": statement.excluded.title,
+            "description": statement.excluded.description,
+            "price": statement.excluded.price,
+            "image_urls": statement.excluded.image_urls,
+            "characteristics": statement.excluded.characteristics,
+            "is_deleted": False,
+            "updated": func.now(),
+        },
+    )
+
+
+async def _write(session: AsyncSession, rows: List[dict]) -> int:
+    """Upsert пачки и обновление поисковых индексов; возвращает число новых товаров."""
+    ids = [row["id"] for row in rows]
+    existing = set((await session.scalars(select(Product.id).where(Product.id.in_(ids)))).all())
+    await session.execute(_upsert_statement(rows))
+    # Индексам нужны только поля товара, поэтому хватает несохраняемых объектов Product.
+    products = [Product(**row) for row in rows]
+    await index_products(session, products)
+    await index_product_attributes(session, products)
+    return len(set(ids) - existing)
+
+
+async def _flush_batch(session: AsyncSession, batch: Dict[str, Tuple[int, dict]], report: ImportReport) -> None:
+    """Пишет пачку одной транзакцией; если база отвергла пачку, повторяет строки по одной."""
+    if not batch:
+        return
+    rows = [row for _, row in batch.values()]
+    try:
+        created = await _write(session, rows)
+        await session.commit()
+    except SQLAlchemyError:
+        await session.rollback()
+    else:
+        report.created += created
+        report.updated += len(rows) - created
+        image_derivatives.schedule(url for row in rows for url in row["image_urls"])
+        return
+
+    for line, row in batch.values():
+        try:
+            created = await _write(session, [row])
+            await session.commit()
+        except SQLAlchemyError as exc:
+            await session.rollback()
+            report.add_error(line, row["id"], f"Database error: {exc.__class__.__name__}")
+            continue
+        report.created += created
+        report.updated += 1 - created
+        image_derivatives.schedule(row["image_urls"])
+
+
+async def import_products(
+    session: AsyncSession,
+    parsed_rows: AsyncIterable[ParsedRow],
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportReport:
+    """Загружает товары пачками по `batch_size`, каждую в своей транзакции.
+
+    Категории читаются один раз. Ошибочные строки попадают в отчёт и не
+    мешают остальным; при повторе id в одной пачке побеждает последняя строка.
+    Если поток не читается как UTF-8, уже разобранные строки записываются, а
+    чтение останавливается с `feed_error` в отчёте.
+    """
+    categories = dict((await session.execute(select(Category.slug, Category.id))).all())
+    report = ImportReport()
+    batch: Dict[str, Tuple[int, dict]] = {}
+    try:
+        async for line, parsed in parsed_rows:
+            report.processed += 1
+            if isinstance(parsed, str):
+                report.add_error(line, None, parsed)
+                continue
+            try:
+                payload = ProductCreateRequest.model_validate(parsed)
+            except ValidationError as exc:
+                report.add_error(line, parsed.get("id"), _validation_message(exc))
+                continue
+            category_id = categories.get(payload.category_id.replace("_", "-"))
+            if category_id is None:
+                report.add_error(line, payload.id, f"Unknown category {payload.category_id}")
+                continue
+            batch.pop(payload.id, None)
+            batch[payload.id] = (
+                line,
+                {
+                    "id": payload.id,
+                    "category_id": category_id,
+                    "title": payload.title,
+                    "description": payload.description,
+                    "price": payload.price,
+                    "image_urls": payload.image_urls,
+                    "characteristics": payload.specs,
+                },
+            )
+            if len(batch) >= batch_size:
+                await _flush_batch(session, batch, report)
+                batch = {}
+    except FeedDecodeError as exc:
+        report.feed_error = str(exc)
+    await _flush_batch(session, batch, report)
+    return report
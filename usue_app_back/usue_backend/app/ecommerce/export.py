@@ -0,0 +1,178 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Row, Select, select
+
+from app.core.enums import DataFormat
+from app.db.database import db
+from app.models import Order, OrderItem, User
+
+EXPORT_BATCH_SIZE = 1000
+CSV_COLUMNS = [
+    "order_id",
+    "created_at",
+    "status",
+    "customer_id",
+    "customer_name",
+    "customer_email",
+    "order_total",
+    "product_id",
+    "product_title",
+    "category",
+    "quantity",
+    "price",
+]
+EXPORT_MEDIA_TYPES = {
+    DataFormat.NDJSON: "application/x-ndjson",
+    DataFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def order_export_query(filters: list) -> Select:
+    """Позиции заказов плоскими строками в порядке (created, id заказа, id позиции).
+
+    Порядок колонок важен: ниже строки распаковываются по позиции.
+
+    Позиции одного заказа идут подряд, поэтому заказ собирается из соседних
+    строк без загрузки всей выборки. Заказы без позиций попадают с пустыми полями позиции.
+    """
+    return (
+        select(
+            Order.id,
+            Order.status,
+            Order.total_sum,
+            Order.created,
+            User.id.label("customer_id"),
+            User.full_name.label("customer_name"),
+            User.email.label("customer_email"),
+            OrderItem.product_id,
+            OrderItem.title,
+            OrderItem.category_slug,
+            OrderItem.quantity,
+            OrderItem.price,
+        )
+        .join(User, User.id == Order.user_id)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .where(*filters)
+        .order_by(Order.created, Order.id, OrderItem.id)
+    )
+
+
+async def _partitions(filters: list) -> AsyncIterator[List[Row]]:
+    """Строки выгрузки пачками по `EXPORT_BATCH_SIZE` через серверный курсор.
+
+    Сессия открывается здесь, а не берётся из зависимости: тело ответа
+    читается уже после того, как FastAPI закрыл зависимости запроса.
+    """
+    async for session in db.get_read_session():
+        result = await session.stream(
+            order_export_query(filters).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+
+def _created_at(created: Optional[datetime]) -> str:
+    return created.isoformat() if created else ""
+
+
+def _ndjson_line(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+async def _ndjson_chunks(filters: list) -> AsyncIterator[bytes]:
+    """Один заказ на строку с вложенными позициями; в памяти — пачка строк и текущий заказ."""
+    current: Optional[dict] = None
+    async for partition in _partitions(filters):
+        lines: List[str] = []
+        # Строки распаковываются по позиции: доступ к полям Row по имени заметно дороже на больших выгрузках.
+        for (
+            order_id,
+            order_status,
+            total_sum,
+            created,
+            customer_id,
+            customer_name,
+            customer_email,
+            product_id,
+            title,
+            category_slug,
+            quantity,
+            price,
+        ) in partition:
+            if current is None or current["id"] != order_id:
+                if current is not None:
+                    lines.append(_ndjson_line(current))
+                current = {
+                    "id": order_id,
+                    "status": order_status,
+                    "total_sum": total_sum,
+                    "created_at": _created_at(created),
+                    "customer": {"id": customer_id, "full_name": customer_name, "email": customer_email},
+                    "items": [],
+                }
+            if product_id is not None:
+                current["items"].append(
+                    {
+                        "product_id": product_id,
+                        "title": title or "",
+                        "category": category_slug or "",
+                        "quantity": quantity,
+                        "price": price,
+                    }
+                )
+        if lines:
+            yield "".join(lines).encode("utf-8")
+    if current is not None:
+        yield _ndjson_line(current).encode("utf-8")
+
+
+def _csv_chunk(rows: Iterable[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def _csv_chunks(filters: list) -> AsyncIterator[bytes]:
+    """Одна позиция заказа на строку CSV; NULL из LEFT JOIN превращаются в пустые ячейки."""
+    yield _csv_chunk([CSV_COLUMNS])
+    async for partition in _partitions(filters):
+        yield _csv_chunk(
+            (
+                order_id,
+                _created_at(created),
+                order_status,
+                customer_id,
+                customer_name,
+                customer_email,
+                total_sum,
+                product_id,
+                title,
+                category_slug,
+                quantity,
+                price,
+            )
+            for (
+                order_id,
+                order_status,
+                total_sum,
+                created,
+                customer_id,
+                customer_name,
+                customer_email,
+                product_id,
+                title,
+                category_slug,
+                quantity,
+                price,
+            ) in partition
+        )
+
+
+def export_orders(filters: list, export_format: DataFormat) -> AsyncIterator[bytes]:
+    if export_format == DataFormat.CSV:
+        return _csv_chunks(filters)
+    return _ndjson_chunks(filters)
@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row, Select, String, and_, literal, or_, type_coerce
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def sort_key(column: InstrumentedAttribute) -> Any:
+    """Колонка сортировки, значение которой попадает в курсор следующей страницы."""
+    return column.label("sort_key")
+
+
+def raw_created(column: InstrumentedAttribute) -> Any:
+    """Колонка `created` в том виде, в котором она лежит в SQLite (без парсинга в datetime)."""
+    return type_coerce(column, String).label("sort_key")
+
+
+def stored_timestamp(value: datetime) -> Any:
+    """Граница диапазона дат в формате CURRENT_TIMESTAMP (UTC, до секунд) для сравнения с `created`."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return literal(value.strftime("%Y-%m-%d %H:%M:%S"), String)
+
+
+def encode_cursor(key_value: Any, row_id: Any) -> str:
+    payload = json.dumps([key_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+    return key_value, row_id
+
+
+def encode_offset(offset: int) -> str:
+    """Курсор для выдачи, упорядоченной не по (created, id), а, например, по релевантности."""
+    return encode_cursor("offset", offset)
+
+
+def decode_offset(cursor: str) -> int:
+    kind, offset = decode_cursor(cursor)
+    if kind != "offset" or not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return offset
+
+
+def apply_keyset(
+    query: Select,
+    key_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True,
+) -> Select:
+    """Сортировка по (key_column, id) и переход за курсор.
+
+    Строковое значение из курсора сравнивается с колонкой как строка: для
+    `created` это совпадает с форматом, в котором его хранит SQLite, и
+    позволяет использовать индекс.
+    """
+    if descending:
+        query = query.order_by(key_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(key_column.asc(), id_column.asc())
+    if cursor:
+        key_value, row_id = decode_cursor(cursor)
+        if isinstance(key_value, str):
+            key_value = literal(key_value, String)
+        elif isinstance(key_value, bool) or not isinstance(key_value, (int, float)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if isinstance(row_id, bool) or not isinstance(row_id, (str, int)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if descending:
+            after = or_(key_column < key_value, and_(key_column == key_value, id_column < row_id))
+        else:
+            after = or_(key_column > key_value, and_(key_column == key_value, id_column > row_id))
+        query = query.where(after)
+    return query.limit(limit + 1)
+
+
+def split_page(
+    rows: Sequence[Row],
+    limit: int,
+    row_id: Callable[[Row], Any] = lambda row: row[0].id,
+) -> Tuple[Sequence[Row], Optional[str]]:
+    """Отрезает лишнюю строку, запрошенную `apply_keyset`, и строит курсор следующей страницы.
+
+    По умолчанию id берётся у сущности в первой колонке; для выборок по
+    отдельным колонкам нужно передать `row_id`.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.sort_key, row_id(last))
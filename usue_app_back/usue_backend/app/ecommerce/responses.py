@@ -0,0 +1,30 @@
+from functools import lru_cache
+from typing import List, Sequence, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+# Заголовки тела пересчитываются для нового ответа, остальные переносятся как есть.
+_BODY_HEADERS = {"content-length", "content-type"}
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(item_type: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[item_type])
+
+
+def encode_list(items: Sequence[BaseModel], item_type: Type[BaseModel]) -> bytes:
+    """JSON списка уже собранных моделей сериализатором pydantic-core, без повторной валидации."""
+    return _list_adapter(item_type).dump_json(list(items), by_alias=True)
+
+
+def fast_json_response(items: Sequence[BaseModel], item_type: Type[BaseModel], response: Response) -> Response:
+    """Готовый ответ в обход `response_model`: FastAPI не валидирует возвращённый Response повторно.
+
+    Заголовки, выставленные обработчиком на `response` (курсор, ETag), переносятся.
+    """
+    fast = Response(content=encode_list(items, item_type), media_type="application/json")
+    for name, value in response.headers.items():
+        if name not in _BODY_HEADERS:
+            fast.headers.append(name, value)
+    return fast
@@ -1,23 +1,64 @@
+import asyncio
 import base64
 import re
 import uuid
-from pathlib import Path
-from typing import AsyncIterator, Dict, List, Optional
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, func, insert, literal, select, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
+from app.auth.principal_cache import UserSnapshot, principal_cache
 from app.auth.utils import decode_jwt, encode_jwt
-from app.core.enums import OrderStatus, UserRole
-from app.core.security import hash_password, verify_password
+from app.core.enums import DataFormat, OrderListView, OrderStatus, ProductSort, UserRole
+from app.core.security import DUMMY_PASSWORD_HASH, PasswordHasherBusy, needs_rehash, password_hasher
+from app.core.settings import settings
 from app.db.database import db
-from app.models import Category, Order, OrderItem, Product, Service, User
+from app.db.attribute_index import attribute_conditions, facet_counts_query, index_product_attributes
+from app.db.rollups import apply_order_sales
+from app.db.search_index import build_match_query, index_products, product_search_query
+from app.media.derivatives import image_derivatives
+from app.media.static import static_manifest
+from app.media.storage import UnsupportedMediaType, UploadTooLarge, save_upload_bytes, save_upload_stream
+from app.models import (
+    Category,
+    Order,
+    OrderItem,
+    Product,
+    SalesDailyCategory,
+    SalesDailyStatus,
+    Service,
+    User,
+)
+from .cache import catalog_cache
+from .catalog_import import import_products, parse_feed
+from .export import EXPORT_MEDIA_TYPES, export_orders
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    apply_keyset,
+    decode_offset,
+    encode_offset,
+    raw_created,
+    sort_key,
+    split_page,
+    stored_timestamp,
+)
+from .responses import fast_json_response
 from .schemas import (
+    CacheStatsOut,
     CartEstimateRequest,
     CartEstimateResponse,
     CategoryOut,
+    CategorySalesOut,
+    DailySalesOut,
+    FacetOut,
+    FacetValueOut,
+    ImageDerivativesStatsOut,
     LoginRequest,
     LoginResponse,
     OrderItemOut,
@@ -28,7 +69,13 @@ from .schemas import (
     MediaUploadRequest,
     MediaUploadResponse,
     OrderStatusUpdateRequest,
+    OrderSummaryOut,
+    PasswordHasherStatsOut,
+    ProductImportOut,
     RegisterRequest,
+    SalesAnalyticsOut,
+    SearchHitOut,
+    StatusSalesOut,
     ProductCreateRequest,
     ProductOut,
     UserOut,
@@ -38,10 +85,8 @@ from .schemas import (
 shop_router = APIRouter(prefix="/shop", tags=["shop"])
 
 COOKIE_NAME = "shop_access_token"
-STATIC_ROOT = Path(__file__).resolve().parents[1] / "static"
-UPLOADS_DIR = STATIC_ROOT / "uploads"
-UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
-MEDIA_UPLOAD_PREFIX = "/static/uploads"
+CATALOG_CHANGED_KEY = "catalog_changed"
+ATTRIBUTE_FILTER_PREFIX = "attr."
 DATA_URL_RE = re.compile(r"^data:image/(png);base64,(?P<data>[A-Za-z0-9+/=]+)$")
 
 
@@ -50,6 +95,11 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         yield session
 
 
+async def get_read_session() -> AsyncIterator[AsyncSession]:
+    async for session in db.get_read_session():
+        yield session
+
+
 def _normalize_category(category_id: str) -> str:
     return category_id.replace("_", "-")
 
@@ -63,10 +113,10 @@ def _save_data_url_file(data_url: str) -> str:
         binary_data = base64.b64decode(payload)
     except (ValueError, KeyError) as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image payload") from exc
-    file_name = f"media_{uuid.uuid4().hex}.png"
-    file_path = UPLOADS_DIR / file_name
-    file_path.write_bytes(binary_data)
-    return f"{MEDIA_UPLOAD_PREFIX}/{file_name}"
+    try:
+        return save_upload_bytes(binary_data)
+    except UnsupportedMediaType as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image payload") from exc
 
 
 def _map_product(product: Product) -> ProductOut:
@@ -77,68 +127,76 @@ def _map_product(product: Product) -> ProductOut:
         description=product.description,
         price=product.price,
         categories=[category_slug],
-        image_urls=product.image_urls or [],
+        image_urls=[static_manifest.url(url) for url in product.image_urls or []],
+        image_variants=image_derivatives.variants_list(product.image_urls or []),
         characteristics=product.characteristics or {},
         created_at=product.created.timestamp() if product.created else 0,
     )
 
 
-class _VirtualProduct:
-    def __init__(self, service: Service):
-        self.id = service.id
-        self.title = service.title
-        self.description = service.description
-        self.price = service.price
-        self.image_urls = [service.image_url] if service.image_url else []
-        self.characteristics = {"type": "service"}
-        self.category = service.category
+async def _index_products(session: AsyncSession, products: List[Product]) -> None:
+    await index_products(session, products)
+    await index_product_attributes(session, products)
 
 
-async def _resolve_product_or_service(
-    session: AsyncSession,
-    product_id: str,
-    *,
-    ensure_real_product: bool = False,
-) -> Optional[Product]:
-    product_query = await session.execute(
-        select(Product).options(selectinload(Product.category)).where(Product.id == product_id)
+async def _resolve_products_or_services(session: AsyncSession, item_ids: Set[str]) -> Dict[str, Product]:
+    """Товары для заказа одним запросом; id, которых нет среди товаров, ищутся среди услуг
+    и заводятся как товары. Ненайденных id в результате нет.
+    """
+    if not item_ids:
+        return {}
+    result = await session.execute(
+        select(Product).options(joinedload(Product.category)).where(Product.id.in_(item_ids))
     )
-    product = product_query.scalar_one_or_none()
-    if product:
-        return product
+    products = {product.id: product for product in result.scalars()}
+    missing = item_ids - products.keys()
+    if not missing:
+        return products
 
-    service_query = await session.execute(
-        select(Service).options(selectinload(Service.category)).where(Service.id == product_id)
+    result = await session.execute(
+        select(Service).options(joinedload(Service.category)).where(Service.id.in_(missing))
     )
-    service = service_query.scalar_one_or_none()
-    if not service:
-        return None
-
-    if not ensure_real_product:
-        return _VirtualProduct(service)  # type: ignore[return-value]
+    services = result.scalars().all()
+    if not services:
+        return products
 
-    category_id = service.category_id
-    if category_id is None:
-        fallback_category = await session.scalar(select(Category.id).limit(1))
+    fallback_category: Optional[Category] = None
+    if any(service.category is None for service in services):
+        fallback_category = await session.scalar(select(Category).order_by(Category.id).limit(1))
         if fallback_category is None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No categories found")
-        category_id = fallback_category
 
-    product = Product(
-        id=service.id,
-        category_id=category_id,
-        title=service.title,
-        description=service.description,
-        price=service.price,
-        image_urls=[service.image_url] if service.image_url else [],
-        characteristics={"type": "service"},
-    )
-    session.add(product)
-    await session.flush()
-    result = await session.execute(
-        select(Product).options(selectinload(Product.category)).where(Product.id == product.id)
+    created: List[Product] = []
+    for service in services:
+        product = Product(
+            id=service.id,
+            category=service.category or fallback_category,
+            title=service.title,
+            description=service.description,
+            price=service.price,
+            image_urls=[service.image_url] if service.image_url else [],
+            characteristics={"type": "service"},
+        )
+        session.add(product)
+        products[product.id] = product
+        created.append(product)
+    await _index_products(session, created)
+    session.info[CATALOG_CHANGED_KEY] = True
+    return products
+
+
+async def _resolve_prices(session: AsyncSession, item_ids: Set[str]) -> Dict[str, float]:
+    """Цены товаров и услуг одним запросом; товар с тем же id важнее услуги."""
+    if not item_ids:
+        return {}
+    query = union_all(
+        select(Product.id, Product.price, literal(0).label("priority")).where(Product.id.in_(item_ids)),
+        select(Service.id, Service.price, literal(1).label("priority")).where(Service.id.in_(item_ids)),
     )
-    return result.scalar_one()
+    prices: Dict[str, float] = {}
+    for item_id, price, _ in sorted((await session.execute(query)).all(), key=lambda row: -row.priority):
+        prices[item_id] = price
+    return prices
 
 
 async def _get_category_by_slug(session: AsyncSession, category_slug: Optional[str]) -> Optional[Category]:
@@ -149,7 +207,7 @@ async def _get_category_by_slug(session: AsyncSession, category_slug: Optional[s
     return result.scalar_one_or_none()
 
 
-def _map_user(user: User) -> UserOut:
+def _map_user(user: User | UserSnapshot) -> UserOut:
     return UserOut(
         id=user.id,
         username=user.username,
@@ -169,7 +227,38 @@ def _map_service(service: Service) -> ServiceOut:
         price=service.price,
         status=service.status,
         category_id=service.category.slug if service.category else None,
-        image_url=service.image_url,
+        image_url=static_manifest.url(service.image_url),
+    )
+
+
+def _order_item_snapshot(product: Product) -> Dict[str, str]:
+    return {
+        "title": product.title,
+        "image_url": product.image_urls[0] if product.image_urls else "",
+        "category_slug": product.category.slug if product.category else "",
+    }
+
+
+def _map_order_item(
+    product_id: str,
+    title: Optional[str],
+    image_url: Optional[str],
+    category_slug: Optional[str],
+    quantity: int,
+    price: float,
+) -> OrderItemOut:
+    return OrderItemOut(
+        product=ProductOut(
+            id=product_id,
+            title=title or "",
+            description="",
+            price=price,
+            categories=[category_slug or ""],
+            image_urls=[static_manifest.url(image_url)] if image_url else [],
+            image_variants=[image_derivatives.variants(image_url)] if image_url else [],
+        ),
+        quantity=quantity,
+        price=price,
     )
 
 
@@ -181,16 +270,33 @@ def _map_order(order: Order) -> OrderOut:
         created_at=order.created,
         customer=_map_user(order.user),
         items=[
-            OrderItemOut(
-                product=_map_product(item.product),
-                quantity=item.quantity,
-                price=item.price,
+            _map_order_item(
+                item.product_id,
+                item.title,
+                item.image_url,
+                item.category_slug,
+                item.quantity,
+                item.price,
             )
             for item in order.items
         ],
     )
 
 
+async def _hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server is busy, retry later") from exc
+
+
+async def _verify_password(password: str, hashed: str) -> bool:
+    try:
+        return await password_hasher.verify(password, hashed)
+    except PasswordHasherBusy as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server is busy, retry later") from exc
+
+
 async def _get_user_by_username(session: AsyncSession, username: str) -> Optional[User]:
     result = await session.execute(select(User).where(User.username == username))
     return result.scalar_one_or_none()
@@ -198,11 +304,14 @@ async def _get_user_by_username(session: AsyncSession, username: str) -> Optiona
 
 async def get_current_user(
     request: Request,
-    session: AsyncSession = Depends(get_session),
-) -> User:
+    session: AsyncSession = Depends(get_read_session),
+) -> UserSnapshot:
     token = request.cookies.get(COOKIE_NAME)
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = decode_jwt(token)
     except Exception as exc:  # pragma: no cover
@@ -213,57 +322,267 @@ async def get_current_user(
     user = await _get_user_by_username(session, username)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    snapshot = UserSnapshot.from_user(user)
+    principal_cache.put(token, payload, snapshot)
+    return snapshot
+
 
+def _catalog_not_modified(request: Request, response: Response, etag: str, match_any: bool = True) -> bool:
+    """`match_any=False` для отдельных записей: `*` не должен давать 304 на несуществующую."""
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return (match_any and "*" in candidates) or etag in candidates
 
-async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+
+def _not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def _list_response(items: list, item_type: type, response: Response):
+    """Список как есть или, при FAST_JSON_RESPONSES, сразу байтами без повторной валидации."""
+    if settings.fast_json_responses:
+        return fast_json_response(items, item_type, response)
+    return items
+
+
+async def require_admin(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     if current_user.role != UserRole.ADMIN.value:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return current_user
 
 
 @shop_router.get("/categories", response_model=List[CategoryOut])
-async def list_categories(session: AsyncSession = Depends(get_session)):
+async def list_categories(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
+    etag = catalog_cache.etag("categories")
+    if _catalog_not_modified(request, response, etag):
+        return _not_modified_response(etag)
+
+    cache_key = catalog_cache.key("categories")
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     result = await session.execute(select(Category).order_by(Category.id))
-    categories = result.scalars().all()
-    return [
+    categories = [
         CategoryOut(
             slug=category.slug,
             title=category.title,
             description=category.description,
-            hero_image=category.hero_image,
+            hero_image=static_manifest.url(category.hero_image),
+            hero_image_variants=image_derivatives.variants(category.hero_image),
         )
-        for category in categories
+        for category in result.scalars().all()
     ]
+    catalog_cache.put(cache_key, categories)
+    return categories
 
 
-@shop_router.get("/products", response_model=List[ProductOut])
-async def list_products(category: Optional[str] = None, session: AsyncSession = Depends(get_session)):
-    query = select(Product).options(selectinload(Product.category)).order_by(Product.created.desc())
+def _attribute_filters(request: Request) -> Dict[str, List[str]]:
+    """Фильтры по характеристикам из параметров вида `attr.<название>=<значение>`."""
+    filters: Dict[str, List[str]] = {}
+    for key, value in request.query_params.multi_items():
+        if key.startswith(ATTRIBUTE_FILTER_PREFIX) and len(key) > len(ATTRIBUTE_FILTER_PREFIX):
+            filters.setdefault(key[len(ATTRIBUTE_FILTER_PREFIX):], []).append(value)
+    return filters
+
+
+def _attribute_filters_key(filters: Dict[str, List[str]]) -> Tuple:
+    return tuple(sorted((name, tuple(sorted(values))) for name, values in filters.items()))
+
+
+async def _product_conditions(
+    session: AsyncSession,
+    category: Optional[str],
+    attributes: Dict[str, List[str]],
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> Optional[list]:
+    """Условия выборки товаров; None, если такой категории нет и выдача заведомо пуста."""
+    conditions = attribute_conditions(attributes)
+    if min_price is not None:
+        conditions.insert(0, Product.price >= min_price)
+    if max_price is not None:
+        conditions.insert(0, Product.price <= max_price)
     if category:
-        normalized = _normalize_category(category)
-        query = query.join(Product.category).where(Category.slug == normalized)
-    result = await session.execute(query)
-    products = result.scalars().unique().all()
-    return [_map_product(product) for product in products]
+        category_id = await session.scalar(
+            select(Category.id).where(Category.slug == _normalize_category(category))
+        )
+        if category_id is None:
+            return None
+        conditions.insert(0, Product.category_id == category_id)
+    return conditions
+
+
+@shop_router.get("/products", response_model=List[ProductOut])
+async def list_products(
+    request: Request,
+    response: Response,
+    category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: ProductSort = ProductSort.NEWEST,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+):
+    attributes = _attribute_filters(request)
+    params = (category, min_price, max_price, _attribute_filters_key(attributes), sort.value, cursor, limit)
+    etag = catalog_cache.etag("products", *params)
+    if _catalog_not_modified(request, response, etag):
+        return _not_modified_response(etag)
+
+    cache_key = catalog_cache.key("products", *params)
+    cached = catalog_cache.get(cache_key)
+    if cached is None:
+        conditions = await _product_conditions(session, category, attributes, min_price, max_price)
+        if conditions is None:
+            cached = [], None
+        else:
+            result = await session.execute(_products_query(conditions, sort, cursor, limit))
+            rows, next_cursor = split_page(result.all(), limit)
+            cached = [_map_product(row[0]) for row in rows], next_cursor
+        catalog_cache.put(cache_key, cached)
+    products, next_cursor = cached
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return _list_response(products, ProductOut, response)
+
+
+# Для каждой сортировки есть индексы (key, id) и (category_id, key, id), см. модель Product.
+_PRODUCT_SORT_KEYS = {
+    ProductSort.NEWEST: (Product.created, True),
+    ProductSort.PRICE: (Product.price, False),
+    ProductSort.PRICE_DESC: (Product.price, True),
+    ProductSort.TITLE: (Product.title, False),
+}
+
+
+def _products_query(conditions: list, sort: ProductSort, cursor: Optional[str], limit: int) -> Select:
+    key_column, descending = _PRODUCT_SORT_KEYS[sort]
+    key = raw_created(key_column) if key_column is Product.created else sort_key(key_column)
+    query = select(Product, key).options(selectinload(Product.category)).where(*conditions)
+    return apply_keyset(query, key_column, Product.id, cursor, limit, descending=descending)
+
+
+@shop_router.get("/products/facets", response_model=List[FacetOut])
+async def product_facets(
+    request: Request,
+    response: Response,
+    category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    session: AsyncSession = Depends(get_read_session),
+):
+    attributes = _attribute_filters(request)
+    params = (category, min_price, max_price, _attribute_filters_key(attributes))
+    etag = catalog_cache.etag("facets", *params)
+    if _catalog_not_modified(request, response, etag):
+        return _not_modified_response(etag)
+
+    cache_key = catalog_cache.key("facets", *params)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    facets: List[FacetOut] = []
+    conditions = await _product_conditions(session, category, {}, min_price, max_price)
+    if conditions is not None:
+        rows = (await session.execute(facet_counts_query(conditions, attributes))).all()
+        values: Dict[str, List[FacetValueOut]] = {}
+        for name, value, count in sorted(rows, key=lambda row: (row.name, -row.count, row.value)):
+            values.setdefault(name, []).append(FacetValueOut(value=value, count=count))
+        facets = [FacetOut(name=name, values=name_values) for name, name_values in values.items()]
+    catalog_cache.put(cache_key, facets)
+    return facets
 
 
 @shop_router.get("/products/{product_id}", response_model=ProductOut)
-async def product_detail(product_id: str, session: AsyncSession = Depends(get_session)):
+async def product_detail(
+    product_id: str,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
+    etag = catalog_cache.etag("product", product_id)
+    if _catalog_not_modified(request, response, etag, match_any=False):
+        return _not_modified_response(etag)
+
+    cache_key = catalog_cache.key("product", product_id)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     result = await session.execute(
         select(Product).options(selectinload(Product.category)).where(Product.id == product_id)
     )
     product = result.scalar_one_or_none()
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    return _map_product(product)
+    product_out = _map_product(product)
+    catalog_cache.put(cache_key, product_out)
+    return product_out
+
+
+@shop_router.get("/search", response_model=List[SearchHitOut])
+async def search_products(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+):
+    etag = catalog_cache.etag("search", q, cursor, limit)
+    if _catalog_not_modified(request, response, etag):
+        return _not_modified_response(etag)
+
+    cache_key = catalog_cache.key("search", q, cursor, limit)
+    cached = catalog_cache.get(cache_key)
+    if cached is None:
+        cached = await _load_search_page(session, q, cursor, limit)
+        catalog_cache.put(cache_key, cached)
+    hits, next_cursor = cached
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return hits
+
+
+async def _load_search_page(
+    session: AsyncSession,
+    q: str,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[SearchHitOut], Optional[str]]:
+    match_query = build_match_query(q)
+    if match_query is None:
+        return [], None
+    offset = decode_offset(cursor) if cursor else 0
+    query = (
+        product_search_query(match_query)
+        .options(selectinload(Product.category))
+        .limit(limit + 1)
+        .offset(offset)
+    )
+    rows = (await session.execute(query)).all()
+    hits = [
+        SearchHitOut(product=_map_product(row[0]), snippet=row.snippet, rank=row.rank)
+        for row in rows[:limit]
+    ]
+    return hits, encode_offset(offset + limit) if len(rows) > limit else None
 
 
 @shop_router.post("/products", response_model=ProductOut)
 async def create_product(
     payload: ProductCreateRequest,
     session: AsyncSession = Depends(get_session),
-    _: User = Depends(require_admin),
+    _: UserSnapshot = Depends(require_admin),
 ):
     normalized_category = _normalize_category(payload.category_id)
     category_result = await session.execute(select(Category).where(Category.slug == normalized_category))
@@ -285,25 +604,66 @@ async def create_product(
         characteristics=payload.specs,
     )
     session.add(product)
+    await _index_products(session, [product])
     await session.commit()
+    catalog_cache.bump()
+    image_derivatives.schedule(payload.image_urls)
     await session.refresh(product)
     return _map_product(product)
 
 
+@shop_router.post("/admin/products/import", response_model=ProductImportOut)
+async def import_products_feed(
+    request: Request,
+    feed_format: DataFormat = Query(DataFormat.NDJSON, alias="format"),
+    session: AsyncSession = Depends(get_session),
+    _: UserSnapshot = Depends(require_admin),
+):
+    """Загрузка товаров потоком NDJSON или CSV с полями ProductCreateRequest; существующие id обновляются.
+
+    В CSV `image_urls` перечисляются через `|`, а `specs` передаётся JSON-объектом.
+    """
+    report = await import_products(session, parse_feed(request.stream(), feed_format))
+    if report.created or report.updated:
+        catalog_cache.bump()
+    return ProductImportOut(
+        processed=report.processed,
+        created=report.created,
+        updated=report.updated,
+        failed=report.failed,
+        errors=report.errors,
+        feed_error=report.feed_error,
+    )
+
+
 @shop_router.get("/services", response_model=List[ServiceOut])
-async def list_services(session: AsyncSession = Depends(get_session)):
+async def list_services(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
+    etag = catalog_cache.etag("services")
+    if _catalog_not_modified(request, response, etag):
+        return _not_modified_response(etag)
+
+    cache_key = catalog_cache.key("services")
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     result = await session.execute(
         select(Service).options(selectinload(Service.category)).order_by(Service.title)
     )
-    services = result.scalars().all()
-    return [_map_service(service) for service in services]
+    services = [_map_service(service) for service in result.scalars().all()]
+    catalog_cache.put(cache_key, services)
+    return services
 
 
 @shop_router.post("/services", response_model=ServiceOut, status_code=status.HTTP_201_CREATED)
 async def create_service(
     payload: ServiceCreateRequest,
     session: AsyncSession = Depends(get_session),
-    _: User = Depends(require_admin),
+    _: UserSnapshot = Depends(require_admin),
 ):
     existing = await session.execute(select(Service).where(Service.id == payload.id))
     if existing.scalar_one_or_none():
@@ -321,6 +681,7 @@ async def create_service(
     )
     session.add(service)
     await session.commit()
+    catalog_cache.bump()
     result = await session.execute(
         select(Service).where(Service.id == service.id).options(selectinload(Service.category))
     )
@@ -333,7 +694,7 @@ async def update_service(
     service_id: str,
     payload: ServiceUpdateRequest,
     session: AsyncSession = Depends(get_session),
-    _: User = Depends(require_admin),
+    _: UserSnapshot = Depends(require_admin),
 ):
     result = await session.execute(
         select(Service).where(Service.id == service_id).options(selectinload(Service.category))
@@ -357,6 +718,7 @@ async def update_service(
         service.category_id = category.id if category else None
 
     await session.commit()
+    catalog_cache.bump()
     result = await session.execute(
         select(Service).where(Service.id == service.id).options(selectinload(Service.category))
     )
@@ -367,9 +729,34 @@ async def update_service(
 @shop_router.post("/media/upload", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_media(
     payload: MediaUploadRequest,
-    _: User = Depends(require_admin),
+    _: UserSnapshot = Depends(require_admin),
+):
+    # Совместимый путь для старых клиентов; декодирование и запись — вне event loop.
+    url = await asyncio.to_thread(_save_data_url_file, payload.data_url)
+    image_derivatives.schedule([url])
+    return MediaUploadResponse(url=url)
+
+
+@shop_router.post("/media/upload/stream", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_media_stream(
+    request: Request,
+    _: UserSnapshot = Depends(require_admin),
 ):
-    url = _save_data_url_file(payload.data_url)
+    """Загрузка изображения сырым телом запроса (PNG, JPEG или WebP), без base64.
+
+    Формат определяется по первым байтам, а не по заголовку Content-Type.
+    """
+    max_bytes = settings.media_upload_max_bytes
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload is too large")
+    try:
+        url = await save_upload_stream(request.stream(), max_bytes)
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload is too large") from exc
+    except UnsupportedMediaType as exc:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc)) from exc
+    image_derivatives.schedule([url])
     return MediaUploadResponse(url=url)
 
 
@@ -391,7 +778,7 @@ async def register(payload: RegisterRequest, response: Response, session: AsyncS
         username=username,
         full_name=username.title(),
         email=email,
-        password_hash=hash_password(payload.password),
+        password_hash=await _hash_password(payload.password),
         role=UserRole.CUSTOMER.value,
         phone=phone,
     )
@@ -414,8 +801,12 @@ async def register(payload: RegisterRequest, response: Response, session: AsyncS
 async def login(payload: LoginRequest, response: Response, session: AsyncSession = Depends(get_session)):
     username = payload.username.lower()
     user = await _get_user_by_username(session, username)
-    if not user or not verify_password(payload.password, user.password_hash):
+    password_hash = user.password_hash if user else DUMMY_PASSWORD_HASH
+    if not await _verify_password(payload.password, password_hash) or not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid login/password pair")
+    if needs_rehash(user.password_hash):
+        user.password_hash = await _hash_password(payload.password)
+        await session.commit()
 
     token = encode_jwt({"sub": user.username, "role": user.role})
     response.set_cookie(
@@ -435,28 +826,29 @@ async def logout(response: Response):
 
 
 @shop_router.get("/auth/me", response_model=LoginResponse)
-async def current_user(user: User = Depends(get_current_user)):
+async def current_user(user: UserSnapshot = Depends(get_current_user)):
     return LoginResponse(access_token="", user=_map_user(user))
 
 
 @shop_router.post("/cart/estimate", response_model=CartEstimateResponse)
 async def estimate_cart(
     payload: CartEstimateRequest,
-    _: User = Depends(get_current_user),
+    _: UserSnapshot = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
     totals: Dict[str, float] = {}
     total_sum = 0.0
     total_items = 0
 
+    prices = await _resolve_prices(session, {item.product_id for item in payload.items})
     for item in payload.items:
-        product = await _resolve_product_or_service(session, item.product_id, ensure_real_product=False)
-        if not product:
+        price = prices.get(item.product_id)
+        if price is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product or service {item.product_id} not found",
             )
-        amount = product.price * item.quantity  # type: ignore[attr-defined]
+        amount = price * item.quantity
         totals[item.product_id] = amount
         total_sum += amount
         total_items += item.quantity
@@ -471,51 +863,74 @@ async def estimate_cart(
 )
 async def create_order(
     payload: CartEstimateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    product_ids = [item.product_id for item in payload.items]
-    products: Dict[str, Product] = {}
-    for product_id in set(product_ids):
-        product = await _resolve_product_or_service(session, product_id, ensure_real_product=True)
-        if not product:
+    products = await _resolve_products_or_services(session, {item.product_id for item in payload.items})
+    for item in payload.items:
+        if item.product_id not in products:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Product or service {product_id} not found",
+                detail=f"Product or service {item.product_id} not found",
             )
-        products[product_id] = product
 
-    order_id = f"ORD-{uuid.uuid4().hex[:8].upper()}"
-    order = Order(id=order_id, user_id=current_user.id, status=OrderStatus.NEW.value, total_sum=0)
+    order = Order(
+        id=f"ORD-{uuid.uuid4().hex[:8].upper()}",
+        user_id=current_user.id,
+        status=OrderStatus.NEW.value,
+        total_sum=sum(products[item.product_id].price * item.quantity for item in payload.items),
+    )
     session.add(order)
     await session.flush()
-
-    for item in payload.items:
-        product = products[item.product_id]
-        line_total = product.price * item.quantity
-        order.total_sum += line_total
-        session.add(
-            OrderItem(order_id=order.id, product_id=product.id, quantity=item.quantity, price=product.price)
-        )
-
+    item_rows = [
+        {
+            "order_id": order.id,
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "price": products[item.product_id].price,
+            **_order_item_snapshot(products[item.product_id]),
+        }
+        for item in payload.items
+    ]
+    # executemany без строк SQLAlchemy выполняет как одиночный INSERT со значениями по умолчанию.
+    if item_rows:
+        await session.execute(insert(OrderItem), item_rows)
+    await apply_order_sales(
+        session,
+        order.created,
+        order.status,
+        order.total_sum,
+        [(row["category_slug"], row["quantity"], row["price"]) for row in item_rows],
+    )
     await session.commit()
-    result = await session.execute(
-        select(Order)
-            .where(Order.id == order.id)
-            .options(
-                selectinload(Order.user),
-                selectinload(Order.items).selectinload(OrderItem.product).selectinload(Product.category),
+    if session.info.pop(CATALOG_CHANGED_KEY, False):
+        catalog_cache.bump()
+
+    return OrderOut(
+        id=order.id,
+        status=order.status,
+        total_sum=order.total_sum,
+        created_at=order.created,
+        customer=_map_user(current_user),
+        items=[
+            _map_order_item(
+                row["product_id"],
+                row["title"],
+                row["image_url"],
+                row["category_slug"],
+                row["quantity"],
+                row["price"],
             )
+            for row in item_rows
+        ],
     )
-    order = result.scalar_one()
-    return _map_order(order)
 
 
 @shop_router.patch("/orders/{order_id}", response_model=OrderOut)
 async def update_order_status(
     order_id: str,
     payload: OrderStatusUpdateRequest,
-    _: User = Depends(require_admin),
+    _: UserSnapshot = Depends(require_admin),
     session: AsyncSession = Depends(get_session),
 ):
     result = await session.execute(
@@ -523,34 +938,37 @@ async def update_order_status(
         .where(Order.id == order_id)
         .options(
             selectinload(Order.user),
-            selectinload(Order.items).selectinload(OrderItem.product).selectinload(Product.category),
+            selectinload(Order.items),
         )
     )
     order = result.scalar_one_or_none()
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
 
-    order.status = payload.status.value
+    if order.status != payload.status.value:
+        sale_items = [(item.category_slug, item.quantity, item.price) for item in order.items]
+        await apply_order_sales(session, order.created, order.status, order.total_sum, sale_items, sign=-1)
+        await apply_order_sales(session, order.created, payload.status.value, order.total_sum, sale_items)
+        order.status = payload.status.value
     await session.commit()
     await session.refresh(order)
     return _map_order(order)
 
 
-@shop_router.get("/orders", response_model=List[OrderOut])
+@shop_router.get("/orders", response_model=List[OrderOut] | List[OrderSummaryOut])
 async def list_orders(
+    response: Response,
     customer_id: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    view: OrderListView = OrderListView.FULL,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: UserSnapshot = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    query = (
-        select(Order)
-        .options(
-            selectinload(Order.user),
-            selectinload(Order.items).selectinload(OrderItem.product).selectinload(Product.category),
-        )
-        .order_by(Order.created.desc())
-    )
-
+    filters = []
     requested_id: Optional[int] = None
     if customer_id:
         try:
@@ -563,32 +981,197 @@ async def list_orders(
     if requested_id is not None:
         if current_user.role != UserRole.ADMIN.value and current_user.id != requested_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No access to this user orders")
-        query = query.where(Order.user_id == requested_id)
+        filters.append(Order.user_id == requested_id)
+
+    if status_filter is not None:
+        filters.append(Order.status == status_filter.value)
+    if created_from is not None:
+        filters.append(Order.created >= stored_timestamp(created_from))
+    if created_to is not None:
+        filters.append(Order.created <= stored_timestamp(created_to))
+
+    if view == OrderListView.SUMMARY:
+        summaries = await _list_order_summaries(session, response, filters, cursor, limit)
+        return _list_response(summaries, OrderSummaryOut, response)
+
+    query = select(Order, raw_created(Order.created)).options(
+        selectinload(Order.user),
+        selectinload(Order.items),
+    )
+    query = apply_keyset(query.where(*filters), Order.created, Order.id, cursor, limit)
+    result = await session.execute(query)
+    rows, next_cursor = split_page(result.all(), limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return _list_response([_map_order(row[0]) for row in rows], OrderOut, response)
 
+
+async def _list_order_summaries(
+    session: AsyncSession,
+    response: Response,
+    filters: list,
+    cursor: Optional[str],
+    limit: int,
+) -> List[OrderSummaryOut]:
+    items_count = (
+        select(func.count(OrderItem.id))
+        .where(OrderItem.order_id == Order.id)
+        .correlate(Order)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Order.id,
+            Order.status,
+            Order.total_sum,
+            Order.created,
+            User.id.label("customer_id"),
+            User.full_name.label("customer_name"),
+            items_count.label("items_count"),
+            raw_created(Order.created),
+        )
+        .join(User, User.id == Order.user_id)
+        .where(*filters)
+    )
+    query = apply_keyset(query, Order.created, Order.id, cursor, limit)
     result = await session.execute(query)
-    orders = result.scalars().unique().all()
-    return [_map_order(order) for order in orders]
+    rows, next_cursor = split_page(result.all(), limit, row_id=lambda row: row.id)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [
+        OrderSummaryOut(
+            id=row.id,
+            status=row.status,
+            total_sum=row.total_sum,
+            created_at=row.created,
+            customer_id=row.customer_id,
+            customer_name=row.customer_name,
+            items_count=row.items_count,
+        )
+        for row in rows
+    ]
+
+
+@shop_router.get("/admin/orders/export")
+async def orders_export(
+    export_format: DataFormat = Query(DataFormat.NDJSON, alias="format"),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    _: UserSnapshot = Depends(require_admin),
+):
+    """Выгрузка заказов потоком: NDJSON (заказ на строку) или CSV (позиция на строку)."""
+    filters = []
+    if status_filter is not None:
+        filters.append(Order.status == status_filter.value)
+    if created_from is not None:
+        filters.append(Order.created >= stored_timestamp(created_from))
+    if created_to is not None:
+        filters.append(Order.created <= stored_timestamp(created_to))
+    return StreamingResponse(
+        export_orders(filters, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{export_format.value}"'},
+    )
+
+
+@shop_router.get("/admin/analytics", response_model=SalesAnalyticsOut)
+async def sales_analytics(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status_filter: Optional[List[OrderStatus]] = Query(None, alias="status"),
+    _: UserSnapshot = Depends(require_admin),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Продажи за период (дни в UTC, границы включительно) из дневных агрегатов.
+
+    `status` можно передать несколько раз; без него учитываются все статусы.
+    """
+    def conditions(model) -> list:
+        filters = []
+        if date_from is not None:
+            filters.append(model.day >= date_from.isoformat())
+        if date_to is not None:
+            filters.append(model.day <= date_to.isoformat())
+        if status_filter:
+            filters.append(model.status.in_([item.value for item in status_filter]))
+        return filters
+
+    def totals(model) -> tuple:
+        return (
+            func.sum(model.revenue).label("revenue"),
+            func.sum(model.orders).label("orders"),
+            func.sum(model.units).label("units"),
+        )
+
+    days = await session.execute(
+        select(SalesDailyStatus.day, *totals(SalesDailyStatus))
+        .where(*conditions(SalesDailyStatus))
+        .group_by(SalesDailyStatus.day)
+        .order_by(SalesDailyStatus.day)
+    )
+    statuses = await session.execute(
+        select(SalesDailyStatus.status, *totals(SalesDailyStatus))
+        .where(*conditions(SalesDailyStatus))
+        .group_by(SalesDailyStatus.status)
+        .order_by(SalesDailyStatus.status)
+    )
+    categories = await session.execute(
+        select(SalesDailyCategory.category_slug, *totals(SalesDailyCategory))
+        .where(*conditions(SalesDailyCategory))
+        .group_by(SalesDailyCategory.category_slug)
+        .order_by(func.sum(SalesDailyCategory.revenue).desc())
+    )
+    return SalesAnalyticsOut(
+        date_from=date_from,
+        date_to=date_to,
+        days=[DailySalesOut(day=row.day, revenue=row.revenue, orders=row.orders, units=row.units) for row in days],
+        statuses=[
+            StatusSalesOut(status=row.status, revenue=row.revenue, orders=row.orders, units=row.units)
+            for row in statuses
+        ],
+        categories=[
+            CategorySalesOut(category=row.category_slug, revenue=row.revenue, orders=row.orders, units=row.units)
+            for row in categories
+        ],
+    )
+
+
+@shop_router.get("/admin/cache", response_model=CacheStatsOut)
+async def catalog_cache_stats(_: UserSnapshot = Depends(require_admin)):
+    return CacheStatsOut(**catalog_cache.stats())
+
+
+@shop_router.get("/admin/password-hasher", response_model=PasswordHasherStatsOut)
+async def password_hasher_stats(_: UserSnapshot = Depends(require_admin)):
+    return PasswordHasherStatsOut(**password_hasher.stats())
+
+
+@shop_router.get("/admin/media", response_model=ImageDerivativesStatsOut)
+async def image_derivatives_stats(_: UserSnapshot = Depends(require_admin)):
+    return ImageDerivativesStatsOut(**image_derivatives.stats())
 
 
 @shop_router.get("/admin/users", response_model=List[UserOut])
 async def list_users(
+    response: Response,
     role: Optional[str] = None,
-    _: User = Depends(require_admin),
-    session: AsyncSession = Depends(get_session),
+    _: UserSnapshot = Depends(require_admin),
+    session: AsyncSession = Depends(get_read_session),
 ):
     query = select(User).order_by(User.created.desc())
     if role:
         query = query.where(User.role == role)
     result = await session.execute(query)
     users = result.scalars().all()
-    return [_map_user(user) for user in users]
+    return _list_response([_map_user(user) for user in users], UserOut, response)
 
 
 @shop_router.patch("/admin/users/{user_id}", response_model=UserOut)
 async def update_user(
     user_id: int,
     payload: UserUpdateRequest,
-    _: User = Depends(require_admin),
+    _: UserSnapshot = Depends(require_admin),
     session: AsyncSession = Depends(get_session),
 ):
     result = await session.execute(select(User).where(User.id == user_id))
@@ -612,11 +1195,12 @@ async def update_user(
         user.role = payload.role.value
 
     if payload.password:
-        user.password_hash = hash_password(payload.password)
+        user.password_hash = await _hash_password(payload.password)
 
     if payload.phone is not None:
         user.phone = payload.phone
 
     await session.commit()
+    principal_cache.invalidate_user(user.id)
     await session.refresh(user)
     return _map_user(user)
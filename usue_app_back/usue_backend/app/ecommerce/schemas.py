@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
@@ -12,6 +12,7 @@ class CategoryOut(BaseModel):
     title: str
     description: str
     hero_image: str
+    hero_image_variants: Dict[str, str] = Field(default_factory=dict)
 
 
 class ProductOut(BaseModel):
@@ -23,10 +24,28 @@ class ProductOut(BaseModel):
     price: float
     categories: List[str]
     image_urls: List[str] = Field(default_factory=list)
+    # Уменьшенные копии по индексам image_urls: {"thumb": url, "medium": url}, пусто — только оригинал.
+    image_variants: List[Dict[str, str]] = Field(default_factory=list)
     characteristics: Dict[str, str] = Field(default_factory=dict)
     created_at: float = Field(default_factory=lambda: 0.0)
 
 
+class FacetValueOut(BaseModel):
+    value: str
+    count: int
+
+
+class FacetOut(BaseModel):
+    name: str
+    values: List[FacetValueOut]
+
+
+class SearchHitOut(BaseModel):
+    product: ProductOut
+    snippet: str
+    rank: float
+
+
 class ProductCreateRequest(BaseModel):
     id: str
     title: str
@@ -37,6 +56,21 @@ class ProductCreateRequest(BaseModel):
     specs: Dict[str, str] = Field(default_factory=dict)
 
 
+class ImportErrorOut(BaseModel):
+    line: int
+    id: Optional[str] = None
+    error: str
+
+
+class ProductImportOut(BaseModel):
+    processed: int
+    created: int
+    updated: int
+    failed: int
+    errors: List[ImportErrorOut]
+    feed_error: Optional[str] = None
+
+
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -105,6 +139,16 @@ class OrderOut(BaseModel):
     items: List[OrderItemOut]
 
 
+class OrderSummaryOut(BaseModel):
+    id: str
+    status: str
+    total_sum: float
+    created_at: datetime
+    customer_id: int
+    customer_name: str
+    items_count: int
+
+
 class OrderStatusUpdateRequest(BaseModel):
     status: OrderStatus
 
@@ -144,3 +188,55 @@ class MediaUploadRequest(BaseModel):
 
 class MediaUploadResponse(BaseModel):
     url: str
+
+
+class SalesTotalsOut(BaseModel):
+    revenue: float
+    orders: int
+    units: int
+
+
+class DailySalesOut(SalesTotalsOut):
+    day: str
+
+
+class StatusSalesOut(SalesTotalsOut):
+    status: str
+
+
+class CategorySalesOut(SalesTotalsOut):
+    category: str
+
+
+class SalesAnalyticsOut(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    days: List[DailySalesOut]
+    statuses: List[StatusSalesOut]
+    categories: List[CategorySalesOut]
+
+
+class CacheStatsOut(BaseModel):
+    version: int
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+
+
+class PasswordHasherStatsOut(BaseModel):
+    workers: int
+    max_pending: int
+    pending: int
+    calls: int
+    rejected: int
+    avg_seconds: float
+    max_seconds: float
+
+
+class ImageDerivativesStatsOut(BaseModel):
+    workers: int
+    ready: int
+    pending: int
+    generated: int
+    failed: int
@@ -0,0 +1 @@
+"""Работа с изображениями каталога: производные размеры и хранение файлов."""
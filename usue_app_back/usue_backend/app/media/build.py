@@ -0,0 +1,80 @@
+"""Сборка статики: копии `app/static/media` с отпечатком содержимого и сжатые версии.
+
+    python -m app.media.build
+
+Каждый файл копируется в `app/static/build/media/<путь>/<имя>.<sha256[:12]>.<ext>`,
+рядом кладутся `.gz` (и `.br`, если установлен пакет `brotli`), когда сжатие
+экономит заметную долю размера. `manifest.json` сопоставляет исходные URL
+собранным; API отдаёт собранные URL после перезапуска. Старые копии не
+удаляются, чтобы клиенты со старыми ответами не получали 404.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .derivatives import STATIC_ROOT, STATIC_URL_PREFIX
+from .static import BUILD_DIR, MANIFEST_PATH
+
+SOURCE_DIR = STATIC_ROOT / "media"
+FINGERPRINT_LENGTH = 12
+# Сжатая копия сохраняется, только если она меньше оригинала хотя бы на столько.
+MIN_SAVING = 0.1
+
+
+def _compressors() -> List[Tuple[str, Callable[[bytes], bytes]]]:
+    compressors: List[Tuple[str, Callable[[bytes], bytes]]] = [
+        (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+    ]
+    try:
+        import brotli
+    except ImportError:
+        return compressors
+    compressors.insert(0, (".br", lambda data: brotli.compress(data, quality=11)))
+    return compressors
+
+
+def _url(path: Path) -> str:
+    return STATIC_URL_PREFIX + path.relative_to(STATIC_ROOT).as_posix()
+
+
+def build(source_dir: Path = SOURCE_DIR, build_dir: Path = BUILD_DIR) -> Dict[str, str]:
+    compressors = _compressors()
+    manifest: Dict[str, str] = {}
+    for source in sorted(source_dir.rglob("*")):
+        if not source.is_file() or source.name.startswith("."):
+            continue
+        data = source.read_bytes()
+        fingerprint = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+        relative = source.relative_to(STATIC_ROOT)
+        target = build_dir / relative.parent / f"{source.stem}.{fingerprint}{source.suffix}"
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+            for suffix, compress in compressors:
+                compressed = compress(data)
+                if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                    target.with_name(target.name + suffix).write_bytes(compressed)
+        manifest[_url(source)] = _url(target)
+    build_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = build_dir / MANIFEST_PATH.name
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    tmp_path.replace(manifest_path)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    manifest = build()
+    compressed = sum(
+        1
+        for url in manifest.values()
+        for suffix in (".gz", ".br")
+        if (STATIC_ROOT / (url[len(STATIC_URL_PREFIX):] + suffix)).exists()
+    )
+    print(f"{len(manifest)} file(s) fingerprinted, {compressed} precompressed copy(ies), manifest: {MANIFEST_PATH}")
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.settings import settings
+from .render import render_variants
+
+logger = logging.getLogger(__name__)
+
+STATIC_ROOT = Path(__file__).resolve().parents[1] / "static"
+STATIC_URL_PREFIX = "/static/"
+DERIVATIVES_DIR = STATIC_ROOT / "derivatives"
+# Имя варианта -> наибольшая сторона в пикселях.
+VARIANT_SIZES = {"thumb": 320, "medium": 960}
+SOURCE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+# Как часто перепроверять на диске копии, которых не было: их мог отрисовать другой процесс.
+MISSING_RECHECK_SECONDS = 5.0
+# `on_ready` вызывается, когда очередь опустела, но не реже этого интервала при непрерывной очереди.
+READY_NOTIFY_SECONDS = 5.0
+
+
+class ImageDerivatives:
+    """Производные WebP-копии изображений из `app/static` и их дисковый кэш.
+
+    Копия для `/static/<путь>.<ext>` лежит в `static/derivatives/<вариант>/<путь>.webp`
+    и отдаётся той же статикой. Копии считаются в пуле процессов; пока они не
+    готовы, `variants()` возвращает пустой словарь и клиент берёт оригинал.
+    Копии, отрисованные другим процессом, находятся по файлам на диске.
+    Когда очередь опустела, вызывается `on_ready`, чтобы один раз сбросить кэш
+    ответов на всю пачку.
+    """
+
+    def __init__(self, static_root: Path, cache_dir: Path, workers: int, quality: int):
+        self.static_root = static_root.resolve()
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.quality = quality
+        self.generated = 0
+        self.failed = 0
+        self.on_ready: Optional[Callable[[], object]] = None
+        self._ready: Set[str] = set()
+        # url -> время последней проверки, на которой копий на диске не было.
+        self._missing: Dict[str, float] = {}
+        self._unannounced = False
+        self._announced_at = time.monotonic()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _source_path(self, url: str) -> Optional[Path]:
+        if not url.startswith(STATIC_URL_PREFIX):
+            return None
+        relative = url[len(STATIC_URL_PREFIX):]
+        if relative.startswith("derivatives/"):
+            return None
+        path = (self.static_root / relative).resolve()
+        if path.suffix.lower() not in SOURCE_SUFFIXES or not path.is_relative_to(self.static_root):
+            return None
+        return path
+
+    def variant_paths(self, source: Path) -> Dict[str, Path]:
+        relative = source.relative_to(self.static_root).with_suffix(".webp")
+        return {name: self.cache_dir / name / relative for name in VARIANT_SIZES}
+
+    def _variant_url(self, path: Path) -> str:
+        return STATIC_URL_PREFIX + path.relative_to(self.static_root).as_posix()
+
+    @staticmethod
+    def _is_fresh(source: Path, targets: Iterable[Path]) -> bool:
+        try:
+            source_mtime = source.stat().st_mtime
+            return all(target.stat().st_mtime >= source_mtime for target in targets)
+        except FileNotFoundError:
+            return False
+
+    def variants(self, url: str) -> Dict[str, str]:
+        """URL готовых копий вида {"thumb": ..., "medium": ...}; пусто, если копий ещё нет."""
+        if url not in self._ready and not self._found_on_disk(url):
+            return {}
+        source = self._source_path(url)
+        if source is None:
+            return {}
+        return {name: self._variant_url(path) for name, path in self.variant_paths(source).items()}
+
+    def _found_on_disk(self, url: str) -> bool:
+        """Проверка свежих копий на диске; отсутствие запоминается на `MISSING_RECHECK_SECONDS`."""
+        if url in self._pending:
+            return False
+        checked_at = self._missing.get(url)
+        now = time.monotonic()
+        if checked_at is not None and now - checked_at < MISSING_RECHECK_SECONDS:
+            return False
+        source = self._source_path(url)
+        if source is not None and self._is_fresh(source, self.variant_paths(source).values()):
+            self._missing.pop(url, None)
+            self._ready.add(url)
+            return True
+        self._missing[url] = now
+        return False
+
+    def variants_list(self, urls: Iterable[str]) -> List[Dict[str, str]]:
+        return [self.variants(url) for url in urls]
+
+    def schedule(self, urls: Iterable[str]) -> None:
+        """Ставит в очередь копии для локальных изображений, у которых их ещё нет.
+
+        Свежие копии с диска сразу помечаются готовыми. Вызывать из event loop.
+        """
+        for url in urls:
+            if not url or url in self._ready or url in self._pending:
+                continue
+            source = self._source_path(url)
+            if source is None or not source.is_file():
+                continue
+            targets = self.variant_paths(source)
+            if self._is_fresh(source, targets.values()):
+                self._ready.add(url)
+                continue
+            task = asyncio.get_running_loop().create_task(self._generate(url, source, targets))
+            self._pending[url] = task
+
+    def schedule_directory(self, directory: Path) -> None:
+        urls = [
+            self._variant_url(path)
+            for path in sorted(directory.resolve().rglob("*"))
+            if path.suffix.lower() in SOURCE_SUFFIXES and path.is_file()
+        ]
+        self.schedule(urls)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: дочерний процесс не наследует event loop и соединения с базой.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _generate(self, url: str, source: Path, targets: Dict[str, Path]) -> None:
+        jobs: List[Tuple[int, str]] = [(VARIANT_SIZES[name], str(path)) for name, path in targets.items()]
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._pool(), render_variants, str(source), jobs, self.quality
+            )
+        except Exception:
+            self.failed += 1
+            logger.exception("Failed to render image variants for %s", url)
+        else:
+            self.generated += 1
+            self._ready.add(url)
+            self._missing.pop(url, None)
+            self._unannounced = True
+        finally:
+            self._pending.pop(url, None)
+        self._announce()
+
+    def _announce(self) -> None:
+        """Один вызов `on_ready` на пачку копий, а не на каждую."""
+        if not self._unannounced:
+            return
+        if self._pending and time.monotonic() - self._announced_at < READY_NOTIFY_SECONDS:
+            return
+        self._unannounced = False
+        self._announced_at = time.monotonic()
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def shutdown(self) -> None:
+        for task in self._pending.values():
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "ready": len(self._ready),
+            "pending": len(self._pending),
+            "generated": self.generated,
+            "failed": self.failed,
+        }
+
+
+image_derivatives = ImageDerivatives(
+    static_root=STATIC_ROOT,
+    cache_dir=DERIVATIVES_DIR,
+    workers=settings.media_derivative_workers,
+    quality=settings.media_derivative_quality,
+)
@@ -0,0 +1,83 @@
+"""Удаление загруженных файлов, на которые больше ничего не ссылается.
+
+    python -m app.media.gc --dry-run
+    python -m app.media.gc --min-age 86400
+
+Живыми считаются файлы из `Product.image_urls`, `Service.image_url`,
+`Category.hero_image` и снимков позиций заказов (`OrderItem.image_url`),
+чтобы история заказов не теряла картинки. Свежие файлы (загруженные или
+повторно загруженные за последние `--min-age` секунд) не трогаются: их могли
+загрузить, но ещё не привязать к товару. Вместе с
+файлом удаляются его производные копии.
+"""
+import argparse
+import asyncio
+import time
+from typing import Set
+
+from sqlalchemy import select
+
+from app.db.database import db
+from app.models import Category, OrderItem, Product, Service
+from .derivatives import image_derivatives
+from .storage import UPLOADS_DIR, last_handed_out, upload_url
+
+BATCH_SIZE = 1000
+
+
+async def referenced_urls() -> Set[str]:
+    urls: Set[str] = set()
+    async for session in db.get_read_session():
+        image_lists = await session.stream_scalars(
+            select(Product.image_urls).execution_options(yield_per=BATCH_SIZE)
+        )
+        async for image_urls in image_lists:
+            urls.update(image_urls or [])
+        for column in (Service.image_url, Category.hero_image, OrderItem.image_url):
+            values = await session.stream_scalars(
+                select(column).where(column.is_not(None)).distinct().execution_options(yield_per=BATCH_SIZE)
+            )
+            async for url in values:
+                urls.add(url)
+    return urls
+
+
+async def collect_garbage(min_age: float, dry_run: bool) -> int:
+    referenced = await referenced_urls()
+    cutoff = time.time() - min_age
+    removed = 0
+    for path in sorted(UPLOADS_DIR.rglob("*")):
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        url = upload_url(path)
+        if url in referenced or last_handed_out(path) > cutoff:
+            continue
+        removed += 1
+        print(f"{'would remove' if dry_run else 'removed'} {url}")
+        if dry_run:
+            continue
+        path.unlink(missing_ok=True)
+        for variant in image_derivatives.variant_paths(path).values():
+            variant.unlink(missing_ok=True)
+    if not dry_run:
+        # Пустые каталоги разветвления после удаления файлов.
+        for directory in sorted(UPLOADS_DIR.rglob("*"), reverse=True):
+            if directory.is_dir() and not any(directory.iterdir()):
+                directory.rmdir()
+    return removed
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        removed = await collect_garbage(args.min_age, args.dry_run)
+    finally:
+        await db.engine.dispose()
+        await db.read_engine.dispose()
+    print(f"{removed} unreferenced file(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-age", type=float, default=3600, help="не удалять файлы моложе, секунд")
+    parser.add_argument("--dry-run", action="store_true", help="только показать, что будет удалено")
+    asyncio.run(main(parser.parse_args()))
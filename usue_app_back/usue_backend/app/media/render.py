@@ -0,0 +1,30 @@
+"""Функции, которые выполняются в процессах пула производных изображений.
+
+Модуль намеренно не импортирует ничего из приложения: процессы пула
+запускаются через spawn и загружают только его.
+"""
+import os
+from pathlib import Path
+from typing import Sequence, Tuple
+
+from PIL import Image, ImageOps
+
+
+def render_variants(source: str, targets: Sequence[Tuple[int, str]], quality: int) -> None:
+    """Сохраняет уменьшенные WebP-копии `source`: по одной на пару (наибольшая сторона, путь).
+
+    Изображение не увеличивается. Файл пишется во временный и переименовывается,
+    чтобы статика никогда не отдала недописанную копию.
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for max_side, target in targets:
+            variant = image.copy()
+            variant.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            target_path = Path(target)
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target_path.with_name(f"{target_path.name}.{os.getpid()}.tmp")
+            variant.save(tmp_path, "WEBP", quality=quality, method=4)
+            os.replace(tmp_path, target_path)
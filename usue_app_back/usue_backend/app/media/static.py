@@ -0,0 +1,118 @@
+import json
+import os
+import re
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .derivatives import STATIC_ROOT
+
+BUILD_DIR = STATIC_ROOT / "build"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+# `<имя>.<hex>.<ext>` после сборки или `<sha256>.<ext>` в загрузках: содержимое по такому пути не меняется.
+FINGERPRINT_RE = re.compile(r"(?:^|\.)[0-9a-f]{12,64}\.[A-Za-z0-9]+$")
+# Порядок предпочтения заранее сжатых копий: суффикс файла и значение Content-Encoding.
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def is_fingerprinted(path: str) -> bool:
+    return FINGERPRINT_RE.search(os.path.basename(path)) is not None
+
+
+def _accepted_encodings(request_headers: Headers) -> set:
+    accepted = set()
+    for part in request_headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 1.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles с заголовками кэширования и заранее сжатыми копиями.
+
+    Пути с отпечатком содержимого отдаются с `immutable` на год, остальные —
+    с `no-cache`, то есть с проверкой по ETag/Last-Modified. Если рядом с
+    файлом лежит `.br` или `.gz` и клиент их принимает, отдаётся сжатая копия.
+    """
+
+    def _precompressed(
+        self, full_path: str, request_headers: Headers
+    ) -> Tuple[Optional[Tuple[str, os.stat_result, str]], bool]:
+        """Подходящая сжатая копия и признак того, что копии вообще есть (для Vary)."""
+        accepted = _accepted_encodings(request_headers)
+        has_variants = False
+        for encoding, suffix in PRECOMPRESSED:
+            try:
+                stat_result = os.stat(full_path + suffix)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            has_variants = True
+            if encoding in accepted:
+                return (full_path + suffix, stat_result, encoding), True
+        return None, has_variants
+
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        encoded, has_variants = self._precompressed(full_path, request_headers)
+        if encoded is not None:
+            encoded_path, encoded_stat, encoding = encoded
+            response = FileResponse(
+                encoded_path,
+                status_code=status_code,
+                stat_result=encoded_stat,
+                media_type=guess_type(full_path)[0] or "application/octet-stream",
+            )
+            response.headers["content-encoding"] = encoding
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if has_variants:
+            response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = (
+            IMMUTABLE_CACHE_CONTROL if is_fingerprinted(full_path) else REVALIDATE_CACHE_CONTROL
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class StaticManifest:
+    """Соответствие исходных URL из `app/static/media` их копиям с отпечатком после сборки.
+
+    Без собранного манифеста URL возвращаются как есть.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._urls: Dict[str, str] = {}
+
+    def load(self) -> None:
+        try:
+            self._urls = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self._urls = {}
+
+    def url(self, url: str) -> str:
+        return self._urls.get(url, url)
+
+
+static_manifest = StaticManifest(MANIFEST_PATH)
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterable, Optional
+
+from .derivatives import STATIC_ROOT
+
+UPLOADS_DIR = STATIC_ROOT / "uploads"
+UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+UPLOADS_URL_PREFIX = "/static/uploads"
+# Сколько первых байт нужно, чтобы узнать формат по сигнатуре.
+SIGNATURE_BYTES = 12
+
+
+class UploadTooLarge(ValueError):
+    """Загружаемый файл больше допустимого размера."""
+
+
+class UnsupportedMediaType(ValueError):
+    """Содержимое файла не похоже на поддерживаемое изображение."""
+
+
+def detect_image_type(header: bytes) -> Optional[str]:
+    """Расширение файла по сигнатуре в первых байтах; None для неизвестных форматов."""
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _content_path(digest: str, extension: str) -> Path:
+    """`uploads/ab/cd/<sha256>.<ext>`: два уровня каталогов, чтобы не копить тысячи файлов в одном."""
+    return UPLOADS_DIR / digest[:2] / digest[2:4] / f"{digest}.{extension}"
+
+
+def mark_handed_out(path: Path) -> None:
+    """Отмечает, что URL файла только что выдан клиенту: GC не тронет его `--min-age` секунд.
+
+    Отметка хранится в atime: mtime менять нельзя, по нему проверяется свежесть производных копий.
+    """
+    os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+
+
+def last_handed_out(path: Path) -> float:
+    """Время создания файла или последней выдачи его URL при повторной загрузке."""
+    stat_result = path.stat()
+    return max(stat_result.st_mtime, stat_result.st_atime)
+
+
+def upload_url(path: Path) -> str:
+    return f"{UPLOADS_URL_PREFIX}/{path.relative_to(UPLOADS_DIR).as_posix()}"
+
+
+def _store(tmp_path: Path, digest: str, extension: str) -> str:
+    """Переносит временный файл на адрес по содержимому; если такой файл уже есть, возвращает его URL."""
+    target = _content_path(digest, extension)
+    if target.exists():
+        tmp_path.unlink(missing_ok=True)
+        mark_handed_out(target)
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.replace(target)
+    return upload_url(target)
+
+
+def save_upload_bytes(data: bytes) -> str:
+    """Синхронная запись уже прочитанного файла (путь для data URL)."""
+    extension = detect_image_type(data[:SIGNATURE_BYTES])
+    if extension is None:
+        raise UnsupportedMediaType("Only PNG, JPEG and WebP images are supported")
+    digest = hashlib.sha256(data).hexdigest()
+    target = _content_path(digest, extension)
+    if target.exists():
+        mark_handed_out(target)
+        return upload_url(target)
+    tmp_path = UPLOADS_DIR / f".upload-{uuid.uuid4().hex}.tmp"
+    tmp_path.write_bytes(data)
+    return _store(tmp_path, digest, extension)
+
+
+async def save_upload_stream(chunks: AsyncIterable[bytes], max_bytes: int) -> str:
+    """Пишет поток байт в `static/uploads` и возвращает URL файла.
+
+    В памяти держится только текущий кусок (и до `SIGNATURE_BYTES` байт до
+    проверки формата); запись на диск идёт в пуле потоков. Файл сначала
+    пишется во временный и получает имя по sha256 содержимого, только когда
+    поток прочитан целиком и уложился в `max_bytes`. Повторная загрузка того
+    же файла возвращает URL уже сохранённой копии.
+    """
+    tmp_path = UPLOADS_DIR / f".upload-{uuid.uuid4().hex}.tmp"
+    handle = await asyncio.to_thread(tmp_path.open, "wb")
+    digest = hashlib.sha256()
+    header = b""
+    extension: Optional[str] = None
+    size = 0
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+            if extension is None:
+                header += chunk
+                if len(header) < SIGNATURE_BYTES:
+                    continue
+                extension = detect_image_type(header)
+                if extension is None:
+                    raise UnsupportedMediaType("Only PNG, JPEG and WebP images are supported")
+                chunk, header = header, b""
+            digest.update(chunk)
+            await asyncio.to_thread(handle.write, chunk)
+        if extension is None:
+            extension = detect_image_type(header)
+            if extension is None:
+                raise UnsupportedMediaType("Only PNG, JPEG and WebP images are supported")
+            digest.update(header)
+            await asyncio.to_thread(handle.write, header)
+        await asyncio.to_thread(handle.close)
+        return await asyncio.to_thread(_store, tmp_path, digest.hexdigest(), extension)
+    except BaseException:
+        await asyncio.to_thread(handle.close)
+        await asyncio.to_thread(tmp_path.unlink, True)
+        raise
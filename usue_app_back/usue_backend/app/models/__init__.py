@@ -1,17 +1,22 @@
 from .base import Base, AuditBase
 from .category import Category
 from .product import Product
+from .product_attribute import ProductAttribute
 from .service import Service
 from .user import User
 from .order import Order, OrderItem
+from .sales_rollup import SalesDailyCategory, SalesDailyStatus
 
 __all__ = [
     "Base",
     "AuditBase",
     "Category",
     "Product",
+    "ProductAttribute",
     "Service",
     "User",
     "Order",
     "OrderItem",
+    "SalesDailyCategory",
+    "SalesDailyStatus",
 ]
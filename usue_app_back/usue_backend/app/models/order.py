@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
-from sqlalchemy import Float, ForeignKey, Integer, String
+from sqlalchemy import Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.enums import OrderStatus
@@ -11,6 +11,13 @@ from .base import Base
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_created_id", "created", "id"),
+        Index("ix_orders_user_created_id", "user_id", "created", "id"),
+        Index("ix_orders_status_created_id", "status", "created", "id"),
+    )
+    # created/updated заполняет БД; забираем их тем же INSERT ... RETURNING, без отдельного refresh.
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -28,10 +35,14 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    order_id: Mapped[str] = mapped_column(ForeignKey("orders.id"))
+    order_id: Mapped[str] = mapped_column(ForeignKey("orders.id"), index=True)
     product_id: Mapped[str] = mapped_column(ForeignKey("products.id"))
     quantity: Mapped[int] = mapped_column(Integer)
     price: Mapped[float] = mapped_column(Float)
+    # Снимок товара на момент оформления: заказ не меняется при правке товара и рендерится без JOIN.
+    title: Mapped[Optional[str]] = mapped_column(String(160), nullable=True)
+    image_url: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    category_slug: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     order = relationship("Order", back_populates="items")
     product = relationship("Product")
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Dict, List
 
-from sqlalchemy import Float, ForeignKey, JSON, String, Text
+from sqlalchemy import Float, ForeignKey, Index, JSON, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -10,6 +10,15 @@ from .base import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_category_created_id", "category_id", "created", "id"),
+        Index("ix_products_created_id", "created", "id"),
+        Index("ix_products_category_price_id", "category_id", "price", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_category_title_id", "category_id", "title", "id"),
+        Index("ix_products_title_id", "title", "id"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[str] = mapped_column(String(80), primary_key=True)
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"))
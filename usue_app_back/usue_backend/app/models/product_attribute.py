@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ProductAttribute(Base):
+    """Характеристика товара в нормализованном виде: для фильтров и подсчёта фасетов без разбора JSON."""
+
+    __tablename__ = "product_attributes"
+    __table_args__ = (
+        Index("ix_product_attributes_name_value_product", "name", "value", "product_id"),
+    )
+
+    product_id: Mapped[str] = mapped_column(ForeignKey("products.id"), primary_key=True)
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str] = mapped_column(String(160))
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from sqlalchemy import Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class SalesDailyStatus(Base):
+    """Продажи за день (UTC) по статусу заказа: выручка по total_sum, число заказов и единиц товара."""
+
+    __tablename__ = "sales_daily_status"
+
+    day: Mapped[str] = mapped_column(String(10), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), primary_key=True)
+    revenue: Mapped[float] = mapped_column(Float, default=0)
+    orders: Mapped[int] = mapped_column(Integer, default=0)
+    units: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class SalesDailyCategory(Base):
+    """Продажи за день по категории и статусу; заказ с позициями из нескольких категорий учтён в каждой."""
+
+    __tablename__ = "sales_daily_category"
+
+    day: Mapped[str] = mapped_column(String(10), primary_key=True)
+    category_slug: Mapped[str] = mapped_column(String(64), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), primary_key=True)
+    revenue: Mapped[float] = mapped_column(Float, default=0)
+    orders: Mapped[int] = mapped_column(Integer, default=0)
+    units: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1 @@
+"""Нагрузочные замеры бэкенда, запускаются как `python -m benchmarks.<модуль>`."""
@@ -0,0 +1,317 @@
+"""Микробенчмарки горячих функций в одном процессе, с сохранением базовой линии и сравнением с ней.
+
+    python -m benchmarks.micro                          # замерить и вывести
+    python -m benchmarks.micro --save                   # записать benchmarks/micro_baseline.json
+    python -m benchmarks.micro --compare --threshold 0.2
+    python -m benchmarks.micro --filter jwt --repeat 7
+
+Каждый случай прогоняется столько раз подряд, чтобы один повтор шёл не
+меньше `--min-time` секунд; в результат идёт лучший из `--repeat` повторов,
+в микросекундах на вызов. В режиме сравнения случай, ставший медленнее
+базовой линии больше чем на `--threshold` (доля), помечается как регрессия,
+и скрипт завершается с кодом 1. Базовая линия зависит от машины, поэтому в
+репозиторий не коммитится.
+
+Резолвер заказов меряется на временной SQLite-базе с демо-каталогом и
+синтетическими товарами, каждая итерация в своей сессии с откатом. Изображения
+сохраняются во временный каталог вместо `app/static/uploads`. База и картинки
+готовятся, только если `--filter` выбирает их случаи.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from PIL import Image
+from sqlalchemy import insert, text
+
+from app.auth.utils import decode_jwt, encode_jwt
+from app.core.enums import OrderStatus, UserRole
+from app.core.security import hash_password, verify_password
+from app.db.database import Database
+from app.db.search_index import _CREATE_SQL as SEARCH_INDEX_SQL
+from app.db.seed import CATEGORIES_SOURCE, PRODUCT_MEDIA, SERVICES_SOURCE
+from app.ecommerce.router import _map_order, _map_product, _resolve_products_or_services, _save_data_url_file
+from app.media import storage
+from app.models import Category, Order, OrderItem, Product, Service, User
+
+DEFAULT_BASELINE = Path(__file__).with_name("micro_baseline.json")
+RESOLVER_PRODUCTS = 5000
+ORDER_ITEMS = 3
+RESOLVER_IDS = [f"bench_{index}" for index in range(0, RESOLVER_PRODUCTS, RESOLVER_PRODUCTS // 4)]
+MEDIA_CASES = ("media.save_data_url.existing", "media.save_data_url.new")
+RESOLVER_CASES = (f"resolver.products.{len(RESOLVER_IDS)}", f"resolver.with_service.{len(RESOLVER_IDS) + 1}")
+
+Benchmark = Union[Callable[[], object], Callable[[], Awaitable[object]]]
+
+
+@dataclass
+class Case:
+    name: str
+    func: Benchmark
+    is_async: bool = False
+
+
+async def _run(case: Case, number: int) -> float:
+    started = time.perf_counter()
+    if case.is_async:
+        for _ in range(number):
+            await case.func()
+    else:
+        for _ in range(number):
+            case.func()
+    return time.perf_counter() - started
+
+
+async def _measure(case: Case, min_time: float, repeat: int) -> Dict[str, float]:
+    """Лучшее время на вызов (мкс) и число вызовов в одном повторе."""
+    await _run(case, 1)  # прогрев: кэши SQLAlchemy, ленивые импорты, первое подключение
+    number = 1
+    while True:
+        elapsed = await _run(case, number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / elapsed) + 1) if elapsed else number * 10
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, await _run(case, number))
+    return {"us_per_op": best / number * 1_000_000, "number": number}
+
+
+def _auth_cases() -> List[Case]:
+    payload = {"sub": "1", "username": "admin", "role": UserRole.ADMIN.value}
+    token = encode_jwt(payload)
+    password_hash = hash_password("benchmark")
+    return [
+        Case("jwt.encode", lambda: encode_jwt(payload)),
+        Case("jwt.decode", lambda: decode_jwt(token)),
+        Case("password.hash", lambda: hash_password("benchmark")),
+        Case("password.verify", lambda: verify_password("benchmark", password_hash)),
+    ]
+
+
+def _product(index: int, category: Category) -> Product:
+    slug = category.slug.replace("-", "_")
+    return Product(
+        id=f"{slug}_{index}",
+        category=category,
+        title=f"{category.title} {index}",
+        description=f"{category.description} Серия #{index}.",
+        price=1990 + index * 1500,
+        image_urls=[PRODUCT_MEDIA[slug][index % len(PRODUCT_MEDIA[slug])]],
+        characteristics={"Питание": "USB-C", "Гарантия": "24 месяца", "Серия": "2025"},
+        created=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _mapping_cases() -> List[Case]:
+    category = Category(**CATEGORIES_SOURCE[0])
+    product = _product(1, category)
+    customer = User(
+        id=1,
+        username="user",
+        full_name="Демо пользователь",
+        email="user@usue.app",
+        password_hash="-",
+        role=UserRole.CUSTOMER.value,
+        phone="+7 900 100-0000",
+        address="Екатеринбург",
+    )
+    items = [_product(index, category) for index in range(1, ORDER_ITEMS + 1)]
+    order = Order(
+        id="ORD-BENCH",
+        user=customer,
+        status=OrderStatus.NEW.value,
+        total_sum=sum(item.price for item in items),
+        created=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        items=[
+            OrderItem(
+                product_id=item.id,
+                quantity=1,
+                price=item.price,
+                title=item.title,
+                image_url=item.image_urls[0],
+                category_slug=category.slug,
+            )
+            for item in items
+        ],
+    )
+    return [
+        Case("map.product", lambda: _map_product(product)),
+        Case(f"map.order.{ORDER_ITEMS}_items", lambda: _map_order(order)),
+    ]
+
+
+def _png(size: int = 256) -> bytes:
+    buffer = io.BytesIO()
+    Image.effect_noise((size, size), 64).convert("RGB").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _data_url(data: bytes) -> str:
+    return "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+
+
+def _media_cases() -> List[Case]:
+    image = _png()
+    existing = _data_url(image)
+    _save_data_url_file(existing)
+    counter = iter(range(sys.maxsize))
+
+    def save_new() -> None:
+        # Байты после PNG-сигнатуры не проверяются, так что хвост делает каждый файл уникальным.
+        _save_data_url_file(_data_url(image + next(counter).to_bytes(8, "big")))
+
+    existing_name, new_name = MEDIA_CASES
+    return [
+        Case(existing_name, lambda: _save_data_url_file(existing)),
+        Case(new_name, save_new),
+    ]
+
+
+async def _seed(database: Database) -> None:
+    await database.init_models()
+    async with database.engine.begin() as conn:
+        await conn.execute(text(SEARCH_INDEX_SQL))
+        await conn.execute(
+            insert(Category),
+            [{"id": index, **seed} for index, seed in enumerate(CATEGORIES_SOURCE, start=1)],
+        )
+        await conn.execute(
+            insert(Product),
+            [
+                {
+                    "id": f"bench_{index}",
+                    "category_id": index % len(CATEGORIES_SOURCE) + 1,
+                    "title": f"Товар {index}",
+                    "description": "benchmark",
+                    "price": 100 + index,
+                    "image_urls": [],
+                    "characteristics": {"Питание": "USB-C"},
+                }
+                for index in range(RESOLVER_PRODUCTS)
+            ],
+        )
+        await conn.execute(
+            insert(Service),
+            [
+                {
+                    "id": seed["id"],
+                    "title": seed["title"],
+                    "description": seed["description"],
+                    "price": seed["price"],
+                    "status": seed["status"],
+                    "category_id": None,
+                    "image_url": "",
+                }
+                for seed in SERVICES_SOURCE
+            ],
+        )
+
+
+def _resolver_cases(database: Database) -> List[Case]:
+    def resolve(item_ids: set) -> Callable[[], Awaitable[None]]:
+        async def run() -> None:
+            async for session in database.get_session():
+                resolved = await _resolve_products_or_services(session, item_ids)
+                assert len(resolved) == len(item_ids)
+                await session.rollback()
+
+        return run
+
+    products_name, with_service_name = RESOLVER_CASES
+    return [
+        Case(products_name, resolve(set(RESOLVER_IDS)), is_async=True),
+        Case(with_service_name, resolve(set(RESOLVER_IDS) | {SERVICES_SOURCE[0]["id"]}), is_async=True),
+    ]
+
+
+def _selected(names: Iterable[str], pattern: str) -> bool:
+    return not pattern or any(pattern in name for name in names)
+
+
+def _print_results(results: Dict[str, Dict[str, float]], baseline: Optional[dict], threshold: float) -> bool:
+    """Печатает таблицу; возвращает True, если есть регрессии относительно базовой линии."""
+    regressed = False
+    if baseline is None:
+        print(f"{'case':<34}{'us/op':>14}{'calls':>10}")
+        for name, result in results.items():
+            print(f"{name:<34}{result['us_per_op']:>14.2f}{result['number']:>10}")
+        return regressed
+
+    reference = baseline["results"]
+    print(f"{'case':<34}{'baseline, us':>14}{'current, us':>14}{'change':>10}")
+    for name, result in results.items():
+        if name not in reference:
+            print(f"{name:<34}{'-':>14}{result['us_per_op']:>14.2f}{'new':>10}")
+            continue
+        previous = reference[name]["us_per_op"]
+        change = result["us_per_op"] / previous - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{name:<34}{previous:>14.2f}{result['us_per_op']:>14.2f}{change:>+10.1%}{flag}")
+    return regressed
+
+
+async def main(args: argparse.Namespace) -> int:
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    results: Dict[str, Dict[str, float]] = {}
+    uploads_dir = storage.UPLOADS_DIR
+    with tempfile.TemporaryDirectory(prefix="usue_bench_") as tmp:
+        database = Database(url=f"sqlite+aiosqlite:///{(Path(tmp) / 'micro.db').as_posix()}")
+        try:
+            cases = _auth_cases() + _mapping_cases()
+            if _selected(MEDIA_CASES, args.filter):
+                storage.UPLOADS_DIR = Path(tmp) / "uploads"
+                storage.UPLOADS_DIR.mkdir()
+                cases += _media_cases()
+            if _selected(RESOLVER_CASES, args.filter):
+                await _seed(database)
+                cases += _resolver_cases(database)
+            for case in cases:
+                if not _selected([case.name], args.filter):
+                    continue
+                results[case.name] = await _measure(case, args.min_time, args.repeat)
+        finally:
+            storage.UPLOADS_DIR = uploads_dir
+            await database.engine.dispose()
+            await database.read_engine.dispose()
+
+    regressed = _print_results(results, baseline, args.threshold)
+    if args.save:
+        args.save.write_text(
+            json.dumps(
+                {
+                    "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        print(f"Baseline saved to {args.save}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", type=Path, nargs="?", const=DEFAULT_BASELINE, help="записать результаты в JSON")
+    parser.add_argument("--compare", type=Path, nargs="?", const=DEFAULT_BASELINE, help="сравнить с базовой линией")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление, доля")
+    parser.add_argument("--min-time", type=float, default=0.2, help="минимум секунд на один повтор")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов на случай")
+    parser.add_argument("--filter", default="", help="только случаи, в имени которых есть подстрока")
+    sys.exit(asyncio.run(main(parser.parse_args())))
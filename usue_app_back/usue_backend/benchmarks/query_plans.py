@@ -0,0 +1,125 @@
+"""Проверка планов запросов списка товаров: ни одна комбинация фильтров и сортировки
+не должна приводить к полному просмотру таблицы.
+
+    python -m benchmarks.query_plans
+
+Запросы строятся тем же кодом, что и в GET /shop/products, на временной
+базе с синтетическим каталогом. Для каждой комбинации выводится план
+EXPLAIN QUERY PLAN; при найденном `SCAN <таблица>` без индекса скрипт
+завершается с кодом 1.
+"""
+import argparse
+import asyncio
+import itertools
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from app.core.enums import ProductSort
+from app.core.settings import settings
+from app.db.attribute_index import attribute_conditions
+from app.db.database import Database
+from app.ecommerce.pagination import encode_cursor
+from app.ecommerce.router import _PRODUCT_SORT_KEYS, _products_query
+from app.models import Category, Product, ProductAttribute
+
+FULL_SCAN_RE = re.compile(r"^SCAN (?!.*USING (COVERING )?INDEX)(?P<table>\w+)")
+CATEGORY_COUNT = 10
+
+
+async def _prepare(database: Database, rows: int) -> None:
+    await database.init_models()
+    async with database.engine.begin() as conn:
+        await conn.execute(
+            insert(Category),
+            [
+                {"id": index, "slug": f"cat-{index}", "title": "", "description": "", "hero_image": ""}
+                for index in range(1, CATEGORY_COUNT + 1)
+            ],
+        )
+        await conn.execute(
+            insert(Product),
+            [
+                {
+                    "id": f"plan_{index}",
+                    "category_id": index % CATEGORY_COUNT + 1,
+                    "title": f"Product {index:06d}",
+                    "description": "",
+                    "price": 100 + index % 5000,
+                    "image_urls": [],
+                    "characteristics": {"Питание": "USB-C" if index % 2 else "Батарея"},
+                }
+                for index in range(rows)
+            ],
+        )
+        await conn.execute(
+            insert(ProductAttribute),
+            [
+                {"product_id": f"plan_{index}", "name": "Питание", "value": "USB-C" if index % 2 else "Батарея"}
+                for index in range(rows)
+            ],
+        )
+
+
+def _cursor_for(sort: ProductSort) -> str:
+    key_column, _ = _PRODUCT_SORT_KEYS[sort]
+    sample = {"created": "2025-01-01 00:00:00", "price": 2500.0, "title": "Product 000500"}[key_column.key]
+    return encode_cursor(sample, "plan_500")
+
+
+def _combinations():
+    categories = [None, 3]
+    price_ranges = [(None, None), (1000, None), (None, 3000), (1000, 3000)]
+    attributes = [{}, {"Питание": ["USB-C"]}]
+    cursors = [False, True]
+    return itertools.product(categories, price_ranges, attributes, list(ProductSort), cursors)
+
+
+async def main(args: argparse.Namespace) -> int:
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="usue_plans_") as tmp:
+        database = Database(
+            url=f"sqlite+aiosqlite:///{(Path(tmp) / 'plans.db').as_posix()}",
+            sqlite_profile=settings.sqlite,
+        )
+        await _prepare(database, args.rows)
+        async with database.engine.connect() as conn:
+            for category_id, (min_price, max_price), attributes, sort, with_cursor in _combinations():
+                conditions = attribute_conditions(attributes)
+                if category_id is not None:
+                    conditions.append(Product.category_id == category_id)
+                if min_price is not None:
+                    conditions.append(Product.price >= min_price)
+                if max_price is not None:
+                    conditions.append(Product.price <= max_price)
+                cursor = _cursor_for(sort) if with_cursor else None
+                compiled = _products_query(conditions, sort, cursor, 50).compile(
+                    dialect=conn.dialect, compile_kwargs={"render_postcompile": True}
+                )
+                params = tuple(compiled.params[name] for name in compiled.positiontup)
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+                details = [row[3] for row in result.all()]
+                scans = [detail for detail in details if FULL_SCAN_RE.match(detail)]
+                label = (
+                    f"category={category_id} price={min_price}..{max_price} "
+                    f"attrs={sorted(attributes)} sort={sort.value} cursor={with_cursor}"
+                )
+                if scans:
+                    failures += 1
+                    print(f"FULL SCAN  {label}: {'; '.join(details)}")
+                elif args.verbose:
+                    print(f"ok         {label}: {'; '.join(details)}")
+        await database.engine.dispose()
+        await database.read_engine.dispose()
+    print(f"{failures} combination(s) with a full table scan")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="товаров в тестовой базе")
+    parser.add_argument("--verbose", action="store_true", help="печатать планы и для успешных комбинаций")
+    sys.exit(asyncio.run(main(parser.parse_args())))
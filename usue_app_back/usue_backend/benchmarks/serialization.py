@@ -0,0 +1,126 @@
+"""Стоимость сериализации одного элемента списка: путь FastAPI через `response_model`
+и быстрый путь `FAST_JSON_RESPONSES`.
+
+    python -m benchmarks.serialization --items 200 --rounds 50
+
+`fastapi` — повторная валидация по `response_model` и JSONResponse, как для
+обычного возврата списка моделей; `fast` — `encode_list` (pydantic-core,
+сразу в байты). Если установлен orjson, для сравнения меряется и
+`orjson.dumps` по `model_dump()`.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.enums import OrderStatus, UserRole
+from app.ecommerce.responses import encode_list
+from app.ecommerce.schemas import OrderItemOut, OrderOut, ProductOut, UserOut
+
+
+def _products(count: int) -> List[ProductOut]:
+    return [
+        ProductOut(
+            id=f"product_{index}",
+            title=f"Товар {index}",
+            description="Описание товара для замера сериализации. " * 3,
+            price=1000 + index,
+            categories=["smart-home"],
+            image_urls=[f"/static/media/products/smart_home_{index % 5 + 1}.png"],
+            image_variants=[
+                {
+                    "thumb": f"/static/derivatives/thumb/media/products/smart_home_{index % 5 + 1}.webp",
+                    "medium": f"/static/derivatives/medium/media/products/smart_home_{index % 5 + 1}.webp",
+                }
+            ],
+            characteristics={"Питание": "USB-C", "Гарантия": "12 месяцев", "Цвет": "белый"},
+            created_at=1700000000.0 + index,
+        )
+        for index in range(count)
+    ]
+
+
+def _users(count: int) -> List[UserOut]:
+    return [
+        UserOut(
+            id=index,
+            username=f"user{index}",
+            full_name="Пользователь",
+            email=f"user{index}@example.com",
+            role=UserRole.CUSTOMER.value,
+            phone="+70000000000",
+            address="Екатеринбург",
+        )
+        for index in range(count)
+    ]
+
+
+def _orders(count: int) -> List[OrderOut]:
+    products = _products(3)
+    customers = _users(50)
+    return [
+        OrderOut(
+            id=f"ORD-{index:08d}",
+            status=OrderStatus.NEW.value,
+            total_sum=sum(product.price * 2 for product in products),
+            created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            customer=customers[index % len(customers)],
+            items=[OrderItemOut(product=product, quantity=2, price=product.price) for product in products],
+        )
+        for index in range(count)
+    ]
+
+
+def _fastapi_encoder(item_type: type) -> Callable[[list], bytes]:
+    field = create_model_field(name="Response", type_=List[item_type], mode="serialization")
+
+    def encode(items: list) -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=items))
+        return JSONResponse(content).body
+
+    return encode
+
+
+def _orjson_encoder() -> Callable[[list], bytes] | None:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return lambda items: orjson.dumps([item.model_dump(mode="json") for item in items])
+
+
+def _per_item_us(encode: Callable[[list], bytes], items: list, rounds: int) -> float:
+    encode(items)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        encode(items)
+    return (time.perf_counter() - started) / rounds / len(items) * 1_000_000
+
+
+def main(args: argparse.Namespace) -> None:
+    datasets = {
+        "products": (ProductOut, _products(args.items)),
+        "orders": (OrderOut, _orders(args.items)),
+        "users": (UserOut, _users(args.items)),
+    }
+    orjson_encode = _orjson_encoder()
+    print(f"{'list':<10}{'fastapi, us/item':>18}{'fast, us/item':>16}{'speedup':>10}{'orjson, us/item':>18}")
+    for name, (item_type, items) in datasets.items():
+        fastapi_encode = _fastapi_encoder(item_type)
+        assert fastapi_encode(items) == encode_list(items, item_type)
+        baseline = _per_item_us(fastapi_encode, items, args.rounds)
+        fast = _per_item_us(lambda batch: encode_list(batch, item_type), items, args.rounds)
+        orjson_cost = f"{_per_item_us(orjson_encode, items, args.rounds):.2f}" if orjson_encode else "-"
+        print(f"{name:<10}{baseline:>18.2f}{fast:>16.2f}{baseline / fast:>9.1f}x{orjson_cost:>18}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200, help="элементов в списке")
+    parser.add_argument("--rounds", type=int, default=50, help="повторов сериализации списка")
+    main(parser.parse_args())
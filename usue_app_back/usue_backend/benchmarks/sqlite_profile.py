@@ -0,0 +1,133 @@
+"""Сравнение пропускной способности SQLite с профилем PRAGMA и без него.
+
+    python -m benchmarks.sqlite_profile --duration 5 --readers 8 --writers 4
+
+Для каждого варианта создаётся отдельная временная база с одинаковыми
+данными; читатели выбирают товары по id, писатели создают заказы каждый в
+своей транзакции.
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.settings import SQLiteProfile, settings
+from app.db.database import Database
+from app.models import Category, Order, OrderItem, Product, User
+
+
+async def _prepare(database: Database, rows: int) -> list[str]:
+    await database.init_models()
+    product_ids = [f"bench_{index}" for index in range(rows)]
+    async with database.engine.begin() as conn:
+        await conn.execute(
+            insert(Category),
+            [{"id": 1, "slug": "bench", "title": "Bench", "description": "", "hero_image": ""}],
+        )
+        await conn.execute(
+            insert(User),
+            [{"id": 1, "username": "bench", "full_name": "Bench", "email": "b@b", "password_hash": "-"}],
+        )
+        await conn.execute(
+            insert(Product),
+            [
+                {
+                    "id": product_id,
+                    "category_id": 1,
+                    "title": f"Product {product_id}",
+                    "description": "benchmark",
+                    "price": 100 + index,
+                    "image_urls": [],
+                    "characteristics": {},
+                }
+                for index, product_id in enumerate(product_ids)
+            ],
+        )
+    return product_ids
+
+
+async def _reader(database: Database, product_ids: list[str], deadline: float, counters: dict) -> None:
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        try:
+            async with database.engine.connect() as conn:
+                await conn.execute(select(Product).where(Product.id == rng.choice(product_ids)))
+            counters["reads"] += 1
+        except OperationalError:
+            counters["errors"] += 1
+
+
+async def _writer(database: Database, product_ids: list[str], deadline: float, counters: dict) -> None:
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        order_id = f"ORD-{uuid.uuid4().hex[:12]}"
+        try:
+            async with database.engine.begin() as conn:
+                await conn.execute(insert(Order).values(id=order_id, user_id=1, status="new", total_sum=100))
+                await conn.execute(
+                    insert(OrderItem).values(
+                        order_id=order_id,
+                        product_id=rng.choice(product_ids),
+                        quantity=1,
+                        price=100,
+                    )
+                )
+            counters["writes"] += 1
+        except OperationalError:
+            counters["errors"] += 1
+
+
+async def _run_case(name: str, profile: SQLiteProfile, args: argparse.Namespace, workdir: Path) -> dict:
+    database = Database(
+        url=f"sqlite+aiosqlite:///{(workdir / f'{name}.db').as_posix()}",
+        pool_size=args.readers + args.writers,
+        max_overflow=0,
+        pool_timeout=settings.db_pool_timeout,
+        sqlite_profile=profile,
+    )
+    product_ids = await _prepare(database, args.rows)
+    counters = {"reads": 0, "writes": 0, "errors": 0}
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(
+        *(_reader(database, product_ids, deadline, counters) for _ in range(args.readers)),
+        *(_writer(database, product_ids, deadline, counters) for _ in range(args.writers)),
+    )
+    await database.engine.dispose()
+    await database.read_engine.dispose()
+    return {
+        "name": name,
+        "reads_per_sec": counters["reads"] / args.duration,
+        "writes_per_sec": counters["writes"] / args.duration,
+        "errors": counters["errors"],
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    baseline = SQLiteProfile(enabled=False)
+    tuned = settings.sqlite.model_copy(update={"enabled": True})
+    with tempfile.TemporaryDirectory(prefix="usue_bench_") as tmp:
+        results = [
+            await _run_case("default", baseline, args, Path(tmp)),
+            await _run_case("tuned", tuned, args, Path(tmp)),
+        ]
+    print(f"{'profile':<10}{'reads/s':>12}{'writes/s':>12}{'errors':>10}")
+    for result in results:
+        print(
+            f"{result['name']:<10}{result['reads_per_sec']:>12.1f}"
+            f"{result['writes_per_sec']:>12.1f}{result['errors']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0, help="секунд на каждый вариант")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=5000, help="товаров в тестовой базе")
+    asyncio.run(main(parser.parse_args()))
@@ -3,11 +3,18 @@ from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
+from app.db.attribute_index import init_attribute_index
+from app.db.backfill import backfill_order_item_snapshots
 from app.db.database import db
+from app.db.rollups import init_sales_rollups
+from app.db.search_index import init_search_index
 from app.db.seed import seed_database
+from app.ecommerce.cache import catalog_cache
+from app.ecommerce.pagination import NEXT_CURSOR_HEADER
 from app.ecommerce.router import shop_router
+from app.media.derivatives import image_derivatives
+from app.media.static import CachedStaticFiles, static_manifest
 
 
 app = FastAPI(title="USUE Shop API", version="0.1.0")
@@ -29,16 +36,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 STATIC_DIR = Path(__file__).resolve().parent / "app" / "static"
 STATIC_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
 
 @app.on_event("startup")
 async def on_startup() -> None:
+    static_manifest.load()
     await db.init_models()
+    await init_search_index()
+    await init_attribute_index()
     await seed_database()
+    await backfill_order_item_snapshots()
+    await init_sales_rollups()
+    # Готовые копии меняют image_variants в ответах каталога.
+    image_derivatives.on_ready = catalog_cache.bump
+    image_derivatives.schedule_directory(STATIC_DIR / "media")
+    image_derivatives.schedule_directory(STATIC_DIR / "uploads")
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    image_derivatives.shutdown()
 
 
 if __name__ == "__main__":
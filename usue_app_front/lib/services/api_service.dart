@@ -8,6 +8,7 @@ import 'package:usue_app_front/models/product_model.dart';
 import 'package:usue_app_front/models/service_model.dart';
 import 'package:usue_app_front/sample_data/sample_catalog.dart';
 import 'http_client_factory.dart';
+import 'paged_fetch.dart';
 
 class ApiService {
   ApiService({http.Client? client}) : _client = client ?? createHttpClient();
@@ -55,9 +56,8 @@ class ApiService {
     if (!AppConfig.useBackend) {
       return SampleCatalog.products;
     }
-    final response = await _client.get(AppConfig.uri('/products'));
-    if (response.statusCode == 200) {
-      final data = jsonDecode(response.body) as List<dynamic>;
+    final data = await fetchAllPages(_client, '/products');
+    if (data != null) {
       return data.map((json) => _mapBackendProduct(json as Map<String, dynamic>)).toList();
     }
     throw Exception('РќРµ СѓРґР°Р»РѕСЃСЊ Р·Р°РіСЂСѓР·РёС‚СЊ С‚РѕРІР°СЂС‹');
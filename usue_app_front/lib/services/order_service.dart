@@ -9,6 +9,7 @@ import 'package:usue_app_front/models/product_model.dart';
 import 'package:usue_app_front/models/user_model.dart';
 import 'package:usue_app_front/sample_data/sample_catalog.dart';
 import 'http_client_factory.dart';
+import 'paged_fetch.dart';
 
 class OrderService {
   OrderService({http.Client? client}) : _client = client ?? createHttpClient();
@@ -19,9 +20,8 @@ class OrderService {
     if (!AppConfig.useBackend) {
       return SampleCatalog.adminOrders.where((order) => order.customer.id == user.id).toList();
     }
-    final response = await _client.get(AppConfig.uri('/orders'));
-    if (response.statusCode == 200) {
-      final data = jsonDecode(response.body) as List<dynamic>;
+    final data = await fetchAllPages(_client, '/orders');
+    if (data != null) {
       return data.map((json) => _fromJson(json as Map<String, dynamic>)).toList();
     }
     throw Exception('РќРµ СѓРґР°Р»РѕСЃСЊ РїРѕР»СѓС‡РёС‚СЊ РІР°С€Рё Р·Р°РєР°Р·С‹, РїРѕРїСЂРѕР±СѓР№С‚Рµ РїРѕР·Р¶Рµ.');
@@ -31,9 +31,8 @@ class OrderService {
     if (!AppConfig.useBackend) {
       return SampleCatalog.adminOrders;
     }
-    final response = await _client.get(AppConfig.uri('/orders'));
-    if (response.statusCode == 200) {
-      final data = jsonDecode(response.body) as List<dynamic>;
+    final data = await fetchAllPages(_client, '/orders');
+    if (data != null) {
       return data.map((json) => _fromJson(json as Map<String, dynamic>)).toList();
     }
     throw Exception('РќРµ СѓРґР°Р»РѕСЃСЊ Р·Р°РіСЂСѓР·РёС‚СЊ СЃРїРёСЃРѕРє Р·Р°РєР°Р·РѕРІ, РїРѕРїСЂРѕР±СѓР№С‚Рµ РїРѕР·Р¶Рµ.');
@@ -0,0 +1,28 @@
+﻿import 'dart:convert';
+
+import 'package:http/http.dart' as http;
+
+import 'package:usue_app_front/config/app_config.dart';
+
+const int _pageSize = 200;
+
+/// Собирает все страницы списка, переходя по заголовку X-Next-Cursor.
+/// Возвращает null, если какая-либо страница ответила не 200.
+Future<List<dynamic>?> fetchAllPages(http.Client client, String path) async {
+  final items = <dynamic>[];
+  String? cursor;
+  do {
+    final uri = AppConfig.uri(path);
+    final response = await client.get(uri.replace(queryParameters: {
+      ...uri.queryParameters,
+      'limit': '$_pageSize',
+      if (cursor != null) 'cursor': cursor,
+    }));
+    if (response.statusCode != 200) {
+      return null;
+    }
+    items.addAll(jsonDecode(response.body) as List<dynamic>);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor != null && cursor.isNotEmpty);
+  return items;
+}